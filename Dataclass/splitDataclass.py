@@ -1,7 +1,11 @@
 from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
+import hashlib
 import json
 from dataclasses import is_dataclass
+from datetime import datetime, timezone
+
+import numpy as np
 
 PRINT_FOR_PHONE = False
 
@@ -13,6 +17,8 @@ class Transaction:
     even_split: Optional[bool] = None
     checked_names: List[str] = field(default_factory=list)
     category: Optional[str] = None
+    timestamp: Optional[float] = None   # epoch seconds; ledgers stamp it on append when missing
+    client_id: Optional[str] = None     # client-chosen id, makes retried uploads idempotent
 
     # Populated later
     avg: Optional[float] = None
@@ -28,9 +34,54 @@ class Participant:
     # transactions: List[Transaction] = field(default_factory=list)
     transactions: List[Dict[str, float]] = field(default_factory=list)
     # each transaction can store { "title": ..., "total_amount": ..., "share": ..., "paid_by": ... }
+    payments_made: Optional[float] = 0.0      # recorded settlement payments sent
+    payments_received: Optional[float] = 0.0  # recorded settlement payments received
+    opening_balance: Optional[float] = 0.0    # net balance carried from the last closed period
+
+
+@dataclass
+class Payment:
+    payer: Optional[str] = None
+    payee: Optional[str] = None
+    amount: Optional[float] = None
+    note: Optional[str] = None
+    timestamp: Optional[float] = None   # epoch seconds; decides which period a payment closes with
 
 
 
+@dataclass
+class LedgerIndex:
+    # Inverted indexes over MoneySplit.transactions, keyed by transaction id (its list position)
+    by_participant: Dict[str, List[Tuple[int, float]]] = field(default_factory=dict)  # name -> [(tx_id, share)]
+    by_payer: Dict[str, List[int]] = field(default_factory=dict)                      # name -> [tx_id]
+    by_pair: Dict[Tuple[str, str], List[Tuple[int, float]]] = field(default_factory=dict)  # (debtor, creditor) -> [(tx_id, share)]
+    pair_totals: Dict[Tuple[str, str], float] = field(default_factory=dict)                # (debtor, creditor) -> sum of shares
+
+
+@dataclass
+class PeriodSnapshot:
+    # Balances at a period close; everything before the cutoff is replaced by this
+    period: int = 0
+    cutoff: Optional[float] = None
+    closed_at: Optional[float] = None
+    transaction_count: int = 0   # transactions folded in (this period only)
+    balances: Dict[str, float] = field(default_factory=dict)                # name -> net balance
+    pair_debts: Dict[Tuple[str, str], float] = field(default_factory=dict)  # (debtor, creditor) -> amount, netted per pair
+
+
+UNCATEGORIZED = "Uncategorized"
+
+
+@dataclass
+class CategoryCube:
+    # Dense participant x category aggregates; columns grow by doubling as categories appear
+    categories: List[str] = field(default_factory=list)
+    category_idx: Dict[str, int] = field(default_factory=dict)
+    name_idx: Dict[str, int] = field(default_factory=dict)
+    owed: np.ndarray = field(default_factory=lambda: np.zeros((0, 0)))   # share owed per (participant, category)
+    paid: np.ndarray = field(default_factory=lambda: np.zeros((0, 0)))   # amount paid per (participant, category)
+
+
 @dataclass
 class MoneySplit:
     name_count: Optional[int] = None
@@ -39,6 +90,120 @@ class MoneySplit:
     transactions: List[Transaction] = field(default_factory=list)
     metadata: Dict[str, Optional[str]] = field(default_factory=lambda: {"split_name": None})
 
+    # Payments journal: recorded settlement payments, and their running totals per (payer, payee)
+    payments: List[Payment] = field(default_factory=list)
+    payment_totals: Dict[Tuple[str, str], float] = field(default_factory=dict, repr=False)
+
+    # Populated during allocation
+    index: LedgerIndex = field(default_factory=LedgerIndex, repr=False)
+    cube: CategoryCube = field(default_factory=CategoryCube, repr=False)
+
+    # Carried-forward state of the last closed period (None: no period closed yet)
+    opening: Optional[PeriodSnapshot] = None
+
+    # Duplicate detection: fingerprints of every transaction ever accepted, and counts
+    fingerprints: Set[str] = field(default_factory=set, repr=False)
+    dedup: Dict[str, int] = field(default_factory=lambda: {"accepted": 0, "duplicates": 0})
+    duplicate_rows: List[int] = field(default_factory=list)   # input rows that repeat an earlier one
+
+
+def parse_timestamp(value):
+    """Epoch seconds from a number or an ISO 8601 string (naive times are UTC); None stays None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"Invalid timestamp '{value}'.")
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    raise ValueError(f"Invalid timestamp '{value}'.")
+
+
+def is_even_split(value, detail_map=None):
+    # One default for the allocator and the validator: a missing even_split
+    # means even, unless explicit uneven shares are given
+    if value is None:
+        return not detail_map
+    return bool(value)
+
+
+def transaction_from_dict(tx: dict) -> Transaction:
+    return Transaction(
+        title=tx.get("title"),
+        amount=tx.get("amount"),
+        paid_by=tx.get("paid_by"),
+        even_split=tx.get("even_split"),
+        checked_names=tx.get("checked_names", []),
+        category=tx.get("category"),
+        timestamp=parse_timestamp(tx.get("timestamp")),
+        client_id=tx.get("client_id"),
+        uneven_split_map=tx.get("uneven_split_map", {})  # Non-even split amounts
+    )
+
+
+def fingerprint(tx) -> Optional[str]:
+    """
+    Stable identity of a transaction: its client_id when given, otherwise a
+    hash of its content when the client supplied a timestamp (a retry
+    resends the same one). None without either: two identical expenses
+    are then two real expenses and are never deduplicated.
+    """
+    get = tx.get if isinstance(tx, dict) else (lambda key, default=None: getattr(tx, key, default))
+    if get("client_id"):
+        return f"id:{get('client_id')}"
+    if get("timestamp") is None:
+        return None
+    amount = get("amount", get("total_amount"))
+    try:
+        amount = round(float(amount), 2)
+    except (TypeError, ValueError):
+        pass
+    shares = get("uneven_split_map") or get("detail_map") or {}
+    content = [
+        get("title"), amount, get("paid_by"), get("even_split"),
+        sorted(get("checked_names") or []), get("category"), get("timestamp"),
+        sorted((name, round(float(v), 2)) for name, v in shares.items()),
+    ]
+    return "sha1:" + hashlib.sha1(json.dumps(content, default=str).encode("utf-8")).hexdigest()
+
+
+def claim_fingerprint(ms, tx, fp=None) -> bool:
+    """Record tx in the duplicate index; False (and counted) if it was already seen. O(1)."""
+    fp = fingerprint(tx) if fp is None else fp
+    if fp is not None and fp in ms.fingerprints:
+        ms.dedup["duplicates"] += 1
+        return False
+    if fp is not None:
+        ms.fingerprints.add(fp)
+    ms.dedup["accepted"] += 1
+    return True
+
+
+def period_to_dict(snapshot: PeriodSnapshot) -> dict:
+    out = asdict(snapshot)
+    out["pair_debts"] = [[d, c, amt] for (d, c), amt in snapshot.pair_debts.items()]
+    return out
+
+
+def period_from_dict(data: dict) -> PeriodSnapshot:
+    return PeriodSnapshot(
+        period=data.get("period", 0),
+        cutoff=parse_timestamp(data.get("cutoff")),
+        closed_at=data.get("closed_at"),
+        transaction_count=data.get("transaction_count", 0),
+        balances={name: float(v) for name, v in data.get("balances", {}).items()},
+        pair_debts={(d, c): float(amt) for d, c, amt in data.get("pair_debts", [])},
+    )
+
 
 def parse_initial_input(input_json: dict) -> MoneySplit:
     ms = MoneySplit()
@@ -50,37 +215,60 @@ def parse_initial_input(input_json: dict) -> MoneySplit:
 
     # Initialize transactions
     tx_list = input_json.get("transactions", [])
-    for tx in tx_list:
-        transaction = Transaction(
-            title=tx.get("title"),
-            amount=tx.get("amount"),
-            paid_by=tx.get("paid_by"),
-            even_split=tx.get("even_split"),
-            checked_names=tx.get("checked_names", []),
-            category=tx.get("category"),
-            uneven_split_map=tx.get("uneven_split_map", {})  # Non-even split amounts
-        )
-        ms.transactions.append(transaction)
-
-    if not ms.transactions:
+    for row, tx in enumerate(tx_list):
+        tx = transaction_from_dict(tx)
+        # Repeats (same client_id, or same content and timestamp) are reported, not dropped
+        if not claim_fingerprint(ms, tx):
+            ms.duplicate_rows.append(row)
+        ms.transactions.append(tx)
+
+    # Opening state from a closed period (see Dataclass/splitPeriods.py)
+    if input_json.get("opening"):
+        ms.opening = period_from_dict(input_json["opening"])
+
+    if not ms.transactions and ms.opening is None:
         raise ValueError("At least one transaction must be provided!")
 
     # Initialize empty participants map
     for name in ms.names:
         ms.names_map[name] = Participant()
 
+    # Previously recorded settlement payments
+    for pay in input_json.get("payments", []):
+        record_payment(ms, pay.get("payer"), pay.get("payee"), pay.get("amount"), pay.get("note"),
+                       parse_timestamp(pay.get("timestamp")))
+
     # print("Initial MoneySplit object created:")
     # print(json.dumps(asdict(ms), indent=2))
     return ms
 
-def new_compute_allocations(ms):
-    """Compute allocations for MoneySplit (modular version)."""
+def new_compute_allocations(ms, start=0):
+    """
+    Compute allocations for MoneySplit (modular version).
+
+    start=0 recomputes everything. With start > 0 only ms.transactions[start:]
+    are allocated on top of the existing totals and index (append-only
+    update), and only the participants they touch get a new net balance.
+    """
+
     def reset_participants(ms):
         for p in ms.names_map.values():
             p.total_paid = 0.0
             p.total_owed = 0.0
             p.net_balance = 0.0
             p.transactions = []
+            p.payments_made = 0.0
+            p.payments_received = 0.0
+            p.opening_balance = 0.0
+        if ms.opening is not None:
+            for name, balance in ms.opening.balances.items():
+                if name in ms.names_map:
+                    ms.names_map[name].opening_balance = balance
+        ms.index = LedgerIndex()
+        ms.cube = new_category_cube(ms.names)
+        for (payer, payee), amount in ms.payment_totals.items():
+            ms.names_map[payer].payments_made += amount
+            ms.names_map[payee].payments_received += amount
 
     def normalize_transaction(raw_tx):
         """Return unified dict of transaction attributes, regardless of input type."""
@@ -90,8 +278,10 @@ def new_compute_allocations(ms):
                 total_amount=raw_tx.get("total_amount", raw_tx.get("amount")),
                 paid_by=raw_tx.get("paid_by"),
                 checked_names=raw_tx.get("checked_names", []) or [],
-                even_split=raw_tx.get("even_split", raw_tx.get("toggle", True)),
+                even_split=is_even_split(raw_tx.get("even_split", raw_tx.get("toggle")),
+                                         raw_tx.get("detail_map", raw_tx.get("uneven_split_map"))),
                 detail_map=raw_tx.get("detail_map", raw_tx.get("uneven_split_map", {})) or {},
+                category=raw_tx.get("category"),
                 raw_ref=raw_tx,
                 is_dict=True
             )
@@ -101,8 +291,10 @@ def new_compute_allocations(ms):
                 total_amount=getattr(raw_tx, "amount", None),
                 paid_by=getattr(raw_tx, "paid_by", None),
                 checked_names=getattr(raw_tx, "checked_names", []) or [],
-                even_split=getattr(raw_tx, "even_split", getattr(raw_tx, "toggle", True)),
+                even_split=is_even_split(getattr(raw_tx, "even_split", getattr(raw_tx, "toggle", None)),
+                                         getattr(raw_tx, "detail_map", getattr(raw_tx, "uneven_split_map", None))),
                 detail_map=getattr(raw_tx, "detail_map", getattr(raw_tx, "uneven_split_map", {})) or {},
+                category=getattr(raw_tx, "category", None),
                 raw_ref=raw_tx,
                 is_dict=False
             )
@@ -164,10 +356,14 @@ def new_compute_allocations(ms):
             raw_tx.avg = avg_unspecified
 
     def update_participants(ms, tx_info, checked_map):
-        """Update each participant’s owed/paid data."""
+        """Update each participant’s owed/paid data, the ledger index and the category cube."""
         title = tx_info["title"]
         total_amount = tx_info["total_amount"]
         paid_by = tx_info["paid_by"]
+        tx_id = tx_info["tx_id"]
+        index = ms.index
+        cube = ms.cube
+        col = category_column(cube, tx_info["category"] or UNCATEGORIZED)
 
         for name, amt in checked_map.items():
             participant = ms.names_map.get(name)
@@ -180,15 +376,23 @@ def new_compute_allocations(ms):
                 "share": float(amt),
                 "paid_by": paid_by
             })
+            index.by_participant.setdefault(name, []).append((tx_id, float(amt)))
+            cube.owed[cube.name_idx[name], col] += float(amt)
+            if name != paid_by:
+                index.by_pair.setdefault((name, paid_by), []).append((tx_id, float(amt)))
+                index.pair_totals[(name, paid_by)] = index.pair_totals.get((name, paid_by), 0.0) + float(amt)
 
         payer = ms.names_map.get(paid_by)
         if payer:
             payer.total_paid += float(total_amount)
+            index.by_payer.setdefault(paid_by, []).append(tx_id)
+            cube.paid[cube.name_idx[paid_by], col] += float(total_amount)
 
-    def compute_net_balances(ms):
-        """Compute final net balance for each participant."""
-        for p in ms.names_map.values():
-            p.net_balance = (p.total_paid or 0.0) - (p.total_owed or 0.0)
+    def compute_net_balances(ms, names=None):
+        """Compute final net balance for each participant (or only for names)."""
+        participants = ms.names_map.values() if names is None else (ms.names_map[n] for n in names)
+        for p in participants:
+            p.net_balance = _net_balance(p)
 
     def safe_asdict(ms):
         """Convert ms safely to dict for debug/logging."""
@@ -221,20 +425,164 @@ def new_compute_allocations(ms):
             return out
 
     # ===== MAIN LOGIC FLOW =====
-    reset_participants(ms)
-
-    for raw_tx in ms.transactions:
+    # Incremental updates need the index and cube already built for these participants;
+    # a MoneySplit that was never allocated (empty cube) is rebuilt from the start
+    if start == 0 or len(ms.cube.name_idx) != len(ms.names_map):
+        reset_participants(ms)
+        start = 0
+
+    touched = set()
+    for tx_id in range(start, len(ms.transactions)):
+        raw_tx = ms.transactions[tx_id]
         tx_info = normalize_transaction(raw_tx)
+        tx_info["tx_id"] = tx_id
         if skip_invalid(tx_info):
             continue
         checked_map, avg_unspecified = compute_checked_map(tx_info)
         store_checked_map(tx_info, checked_map, avg_unspecified)
         update_participants(ms, tx_info, checked_map)
-
-    compute_net_balances(ms)
-    _ = safe_asdict(ms)  # can be printed/logged if needed
+        touched.update(n for n in checked_map if n in ms.names_map)
+        touched.add(tx_info["paid_by"])
+
+    if start == 0:
+        compute_net_balances(ms)
+        _ = safe_asdict(ms)  # can be printed/logged if needed
+    else:
+        compute_net_balances(ms, touched)
     return ms
 
+def new_category_cube(names, capacity=4):
+    n = len(names)
+    return CategoryCube(
+        name_idx={name: i for i, name in enumerate(names)},
+        owed=np.zeros((n, capacity)),
+        paid=np.zeros((n, capacity)),
+    )
+
+
+def category_column(cube, category):
+    """Column of a category in the cube, adding it (amortised O(1)) the first time it is seen."""
+    col = cube.category_idx.get(category)
+    if col is None:
+        col = len(cube.categories)
+        if col == cube.owed.shape[1]:
+            extra = max(col, 4)
+            cube.owed = np.hstack([cube.owed, np.zeros((cube.owed.shape[0], extra))])
+            cube.paid = np.hstack([cube.paid, np.zeros((cube.paid.shape[0], extra))])
+        cube.categories.append(category)
+        cube.category_idx[category] = col
+    return col
+
+
+def cube_rows(cube, touched=None, previous=None):
+    """
+    Read-only (owed, paid) row copies of a cube, trimmed to its categories,
+    for publishing in a snapshot. With previous (the last published rows)
+    only the rows in touched are copied and the rest are shared.
+    """
+    k = len(cube.categories)
+    rows = list(previous) if previous is not None else [None] * cube.owed.shape[0]
+    for i in (range(len(rows)) if previous is None else touched):
+        owed, paid = cube.owed[i, :k].copy(), cube.paid[i, :k].copy()
+        owed.flags.writeable = paid.flags.writeable = False
+        rows[i] = (owed, paid)
+    return tuple(rows)
+
+
+def cube_from_rows(names, categories, rows):
+    """Read-only CategoryCube from published rows; a row published before a category appeared is 0 there."""
+    k = len(categories)
+    owed, paid = np.zeros((len(rows), k)), np.zeros((len(rows), k))
+    for i, (o, p) in enumerate(rows):
+        owed[i, :o.size], paid[i, :p.size] = o, p
+    owed.flags.writeable = paid.flags.writeable = False
+    return CategoryCube(categories=list(categories), category_idx={c: j for j, c in enumerate(categories)},
+                        name_idx={name: i for i, name in enumerate(names)}, owed=owed, paid=paid)
+
+
+def category_cell(cube, name, category):
+    """{"owed", "paid"} of one participant in one category, O(1)."""
+    i = cube.name_idx[name]
+    c = cube.category_idx.get(category)
+    if c is None:
+        return {"owed": 0.0, "paid": 0.0}
+    return {"owed": float(cube.owed[i, c]), "paid": float(cube.paid[i, c])}
+
+
+def category_breakdown(cube, name):
+    """Per-category {"owed", "paid"} of one participant (one cube row)."""
+    i = cube.name_idx[name]
+    k = len(cube.categories)
+    return {cat: {"owed": float(o), "paid": float(p)}
+            for cat, o, p in zip(cube.categories, cube.owed[i, :k], cube.paid[i, :k])}
+
+
+def category_totals(cube, category):
+    """Per-participant {"owed", "paid"} in one category (one cube column)."""
+    c = cube.category_idx.get(category)
+    if c is None:
+        return {}
+    return {name: {"owed": float(cube.owed[i, c]), "paid": float(cube.paid[i, c])}
+            for name, i in cube.name_idx.items()}
+
+
+def _net_balance(p):
+    # Carried balance, plus expenses paid minus shares owed, then settled by recorded payments
+    return ((p.opening_balance or 0.0) + (p.total_paid or 0.0) - (p.total_owed or 0.0)
+            + (p.payments_made or 0.0) - (p.payments_received or 0.0))
+
+
+def check_payment(ms, payer, payee, amount):
+    for name in (payer, payee):
+        if name not in ms.names_map:
+            raise ValueError(f"Unknown participant '{name}' in payment.")
+    if payer == payee:
+        raise ValueError("A payment needs two different participants.")
+    if amount is None or float(amount) <= 0:
+        raise ValueError("Payment amount must be positive.")
+
+
+def record_payment(ms, payer, payee, amount, note=None, timestamp=None):
+    """
+    Journal a settlement payment ("payer paid payee amount") and apply it to
+    both net balances in place, without recomputing the allocation.
+    """
+    check_payment(ms, payer, payee, amount)
+    amount = float(amount)
+
+    payment = Payment(payer=payer, payee=payee, amount=amount, note=note, timestamp=timestamp)
+    ms.payments.append(payment)
+    ms.payment_totals[(payer, payee)] = ms.payment_totals.get((payer, payee), 0.0) + amount
+
+    p_from, p_to = ms.names_map[payer], ms.names_map[payee]
+    p_from.payments_made += amount
+    p_to.payments_received += amount
+    p_from.net_balance = _net_balance(p_from)
+    p_to.net_balance = _net_balance(p_to)
+    return payment
+
+
+def payment_totals(payments):
+    """Running (payer, payee) -> amount totals of a payments journal."""
+    totals = {}
+    for p in payments:
+        totals[(p.payer, p.payee)] = totals.get((p.payer, p.payee), 0.0) + p.amount
+    return totals
+
+
+def remaining_amount(ms, debtor, creditor):
+    """
+    What debtor still owes creditor on their direct shared expenses, after
+    recorded payments in either direction (negative: creditor owes debtor). O(1).
+    """
+    owed = ms.index.pair_totals
+    paid = ms.payment_totals
+    carried = ms.opening.pair_debts if ms.opening is not None else {}
+    return (owed.get((debtor, creditor), 0.0) - owed.get((creditor, debtor), 0.0)
+            - paid.get((debtor, creditor), 0.0) + paid.get((creditor, debtor), 0.0)
+            + carried.get((debtor, creditor), 0.0) - carried.get((creditor, debtor), 0.0))
+
+
 def compute_allocations(ms):
     """
     Combined, robust compute_allocations function.
@@ -407,16 +755,9 @@ def compute_allocations(ms):
     return ms
 
 
-def print_settlement_matrix(ms: MoneySplit):
-    colnames = ms.names
-    name_to_idx = {name: i for i, name in enumerate(colnames)}
-    n = len(colnames)
-
-    # Initialize empty matrix
-    matrix = [[0.0] * n for _ in range(n)]
-
-    # Fill the matrix based on transactions
-    for tx in ms.transactions:
+def add_to_matrix(matrix, name_to_idx, transactions):
+    """Add each transaction's shares to matrix[debtor][payer] (list of lists or ndarray)."""
+    for tx in transactions:
         payer = tx.paid_by
         if payer not in name_to_idx:
             continue
@@ -430,6 +771,34 @@ def print_settlement_matrix(ms: MoneySplit):
                 continue
             matrix[orow][pc] += amt
 
+
+def add_payments_to_matrix(matrix, name_to_idx, payment_totals):
+    # A recorded payment cancels that much debt: book it as the payee owing the payer,
+    # so settlement only sees the outstanding residual
+    for (payer, payee), amount in payment_totals:
+        matrix[name_to_idx[payee]][name_to_idx[payer]] += amount
+
+
+def add_opening_to_matrix(matrix, name_to_idx, pair_debts):
+    # Debts carried from a closed period, as (debtor, creditor) -> amount
+    for (debtor, creditor), amount in pair_debts:
+        matrix[name_to_idx[debtor]][name_to_idx[creditor]] += amount
+
+
+def print_settlement_matrix(ms: MoneySplit):
+    colnames = ms.names
+    name_to_idx = {name: i for i, name in enumerate(colnames)}
+    n = len(colnames)
+
+    # Initialize empty matrix
+    matrix = [[0.0] * n for _ in range(n)]
+
+    # Fill the matrix from the carried-forward debts, transactions and recorded payments
+    if ms.opening is not None:
+        add_opening_to_matrix(matrix, name_to_idx, ms.opening.pair_debts.items())
+    add_to_matrix(matrix, name_to_idx, ms.transactions)
+    add_payments_to_matrix(matrix, name_to_idx, ms.payment_totals.items())
+
     # Print matrix header
     # header = ["Send To"] + colnames
     # print("\t".join(header))
@@ -482,6 +851,45 @@ def print_split_summary(ms):
         print(json.dumps(tx, indent=4))
     print("==========================================\n")
 
+def statement_entry(ms, tx_id, share):
+    tx = ms.transactions[tx_id]
+    if isinstance(tx, dict):
+        title, amount, paid_by = tx.get("title"), tx.get("total_amount", tx.get("amount")), tx.get("paid_by")
+    else:
+        title, amount, paid_by = tx.title, tx.amount, tx.paid_by
+    return {"tx_id": tx_id, "title": title, "total_amount": amount, "share": share, "paid_by": paid_by}
+
+
+def participant_statement(ms, name):
+    """Shares owed by and amounts paid by one participant, read from the ledger index."""
+    if name not in ms.names_map:
+        raise KeyError(f"Unknown participant '{name}'.")
+    index = ms.index
+    return {
+        "name": name,
+        "shares": [statement_entry(ms, tx_id, share) for tx_id, share in index.by_participant.get(name, [])],
+        "paid": [statement_entry(ms, tx_id, None) for tx_id in index.by_payer.get(name, [])],
+    }
+
+
+def pair_statement(ms, debtor, creditor):
+    """Transactions where creditor paid and debtor took a share, in both directions."""
+    for name in (debtor, creditor):
+        if name not in ms.names_map:
+            raise KeyError(f"Unknown participant '{name}'.")
+    index = ms.index
+    owes = [statement_entry(ms, tx_id, share) for tx_id, share in index.by_pair.get((debtor, creditor), [])]
+    owed = [statement_entry(ms, tx_id, share) for tx_id, share in index.by_pair.get((creditor, debtor), [])]
+    return {
+        "debtor": debtor,
+        "creditor": creditor,
+        "owes": owes,
+        "owed_back": owed,
+        "net": sum(e["share"] for e in owes) - sum(e["share"] for e in owed),
+        "remaining": remaining_amount(ms, debtor, creditor),
+    }
+
+
 def get_matrix(input_data: dict) -> List[List[float]]:
     ms = parse_initial_input(input_data)
 
@@ -0,0 +1,390 @@
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from Dataclass.splitDataclass import (
+    MoneySplit, Participant, transaction_from_dict,
+    new_compute_allocations, check_payment, record_payment, add_to_matrix, add_payments_to_matrix,
+    add_opening_to_matrix, fingerprint, payment_totals, CategoryCube, new_category_cube,
+    cube_rows, cube_from_rows,
+)
+from Dataclass.splitPeriods import close_period, archive_period, check_archive_prefix
+from Dataclass.splitValidate import validate_ledger
+from logic.split_incremental import TransferPlan, resettle_incremental
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class LedgerSnapshot:
+    # Immutable view published after each commit; readers never take a lock
+    version: int
+    committed_at: float
+    names: Tuple[str, ...]
+    net: Tuple[float, ...]
+    # Read-only matrix and cube rows; a row a commit did not touch is shared with the previous snapshot
+    rows: Tuple[np.ndarray, ...] = field(repr=False)
+    cube_rows: Tuple[Tuple[np.ndarray, np.ndarray], ...] = field(repr=False)
+    categories: Tuple[str, ...] = ()
+
+    def balances(self) -> Dict[str, float]:
+        return dict(zip(self.names, self.net))
+
+    @cached_property
+    def matrix(self) -> np.ndarray:
+        """Read-only, matrix[i, j] = what names[i] owes names[j]; assembled on first read."""
+        matrix = np.vstack(self.rows)
+        matrix.flags.writeable = False
+        return matrix
+
+    @cached_property
+    def cube(self) -> CategoryCube:
+        """Read-only per-category aggregates (see cube_from_rows); assembled on first read."""
+        return cube_from_rows(self.names, self.categories, self.cube_rows)
+
+
+class _RowWriter:
+    """
+    matrix[i][j] += x over the published read-only rows: a row is copied the
+    first time it is written, so a batch costs O(rows touched * n), not O(n^2).
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.copied = set()
+
+    def __getitem__(self, i):
+        if i not in self.copied:
+            self.rows[i] = self.rows[i].copy()
+            self.copied.add(i)
+        return self.rows[i]
+
+    def freeze(self):
+        for i in self.copied:
+            self.rows[i].flags.writeable = False
+        return tuple(self.rows)
+
+
+class ConcurrentLedger:
+    """
+    A group ledger that many request threads can append to at once.
+
+    Writers only push onto a lock-free append log (deque.append is atomic).
+    A batched commit drains the log under one commit lock, allocates the batch
+    incrementally (new_compute_allocations(ms, start)) and publishes a new
+    immutable LedgerSnapshot by swapping a single reference. Readers use
+    snapshot() (balances, matrix, category cube) and never block writers
+    or see a half-applied batch.
+
+    A commit copies only the matrix and cube rows of the participants its
+    batch touched; the full matrix is assembled once per snapshot, on read.
+
+    Each commit also re-settles the group's transfer plan incrementally and
+    pushes {version, balances, transfers} deltas to subscribe() queues;
+    both cost O(participants touched by the batch).
+
+    close_period(cutoff) folds older history into a carried-forward
+    snapshot, so commits and settlement only ever see the open period.
+    """
+
+    def __init__(self, names, split_name=None, batch_size=64, group_id=None):
+        names = list(names)
+        if not names:
+            raise ValueError("MoneySplit must have at least one participant.")
+        self.ms = MoneySplit(
+            name_count=len(names),
+            names=names,
+            names_map={name: Participant() for name in names},
+            metadata={"split_name": split_name},
+            cube=new_category_cube(names),
+        )
+        self.batch_size = batch_size
+        # Names the period archives: split_name is display text and not unique
+        self.group_id = group_id or uuid.uuid4().hex
+        check_archive_prefix(self.group_id)
+        self._name_to_idx = {name: i for i, name in enumerate(names)}
+        self._pending = deque()
+        self._seen_lock = threading.Lock()   # guards ms.fingerprints / ms.dedup / _queued_fps
+        self._queued_fps = set()             # fingerprints appended but not yet committed
+        self._commit_lock = threading.Lock()
+        self._rows = _freeze_matrix(np.zeros((len(names), len(names))))
+        self._plan = TransferPlan()
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self.periods = []   # PeriodSnapshot of every closed period, oldest first
+        self._snapshot = self._publish(0)
+
+    # WRITES
+    def append(self, tx, commit=False, check=True):
+        """
+        Queue one transaction (dict or Transaction); commits once a batch is
+        full or when asked. Returns False, without queueing, for a duplicate
+        of a committed or queued transaction (see fingerprint). Invalid
+        transactions raise ValueError before queueing (check=False: caller
+        already validated). A fingerprint is only kept once its commit succeeds.
+        """
+        if check:
+            report = validate_ledger([tx], self.ms.names)
+            if not report.ok:
+                raise ValueError("; ".join(e["message"] for e in report.errors))
+        item = self._claim(tx)
+        if item is None:
+            return False
+        self._pending.append(("tx", item))
+        if commit or len(self._pending) >= self.batch_size:
+            self.commit()
+        return True
+
+    def _claim(self, tx):
+        """(tx, fingerprint) ready to queue, or None for a duplicate of a committed or queued transaction."""
+        if isinstance(tx, dict):
+            tx = transaction_from_dict(tx)
+        # Fingerprint before stamping: only a client-supplied timestamp identifies a retry
+        fp = fingerprint(tx)
+        if fp is not None:
+            with self._seen_lock:
+                if fp in self.ms.fingerprints or fp in self._queued_fps:
+                    self.ms.dedup["duplicates"] += 1
+                    return None
+                self._queued_fps.add(fp)
+        if tx.timestamp is None:
+            tx.timestamp = time.time()
+        return tx, fp
+
+    def ingest(self, txs, check=True):
+        """
+        Bulk import: queue every transaction, skipping duplicates, and commit
+        them as one batch, so a failure rolls back the whole import. Returns
+        (snapshot, stats). The whole list is validated in one pass first;
+        ValueError (nothing queued) if any row is invalid.
+        """
+        if check:
+            report = validate_ledger(txs, self.ms.names)
+            if not report.ok:
+                raise ValueError("; ".join(f"row {e['row']}: {e['message']}" for e in report.errors))
+        items, duplicate_rows = [], []
+        try:
+            for row, tx in enumerate(txs):
+                item = self._claim(tx)
+                if item is None:
+                    duplicate_rows.append(row)
+                else:
+                    items.append(item)
+        except Exception:
+            with self._seen_lock:
+                self._queued_fps.difference_update(fp for _, fp in items)
+            raise
+        # One log entry: a concurrent commit drains all of it or none of it
+        self._pending.append(("txs", items))
+        snapshot = self.commit()
+        stats = {
+            "received": len(txs),
+            "accepted": len(txs) - len(duplicate_rows),
+            "duplicates": len(duplicate_rows),
+            "duplicate_rows": duplicate_rows,
+        }
+        return snapshot, stats
+
+    def dedup_stats(self):
+        with self._seen_lock:
+            return dict(self.ms.dedup, indexed=len(self.ms.fingerprints), queued=len(self._queued_fps))
+
+    def add_payment(self, payer, payee, amount, note=None, commit=True, timestamp=None):
+        check_payment(self.ms, payer, payee, amount)  # reject before queueing, commit must not fail
+        if timestamp is None:
+            timestamp = time.time()
+        self._pending.append(("payment", (payer, payee, amount, note, timestamp)))
+        if commit:
+            return self.commit()
+        return None
+
+    def commit(self):
+        """Apply everything queued so far as one batch; returns the published snapshot."""
+        with self._commit_lock:
+            batch = []
+            while True:
+                try:
+                    kind, item = self._pending.popleft()
+                except IndexError:
+                    break
+                if kind == "txs":   # one ingest() call
+                    batch.extend(("tx", entry) for entry in item)
+                else:
+                    batch.append((kind, item))
+            if not batch:
+                return self._snapshot
+
+            ms = self.ms
+            start, start_payments = len(ms.transactions), len(ms.payments)
+            fps = [item[1] for kind, item in batch if kind == "tx" and item[1] is not None]
+            try:
+                ms.transactions.extend(item[0] for kind, item in batch if kind == "tx")
+                new_compute_allocations(ms, start)
+
+                # Copy-on-write: published rows are never mutated
+                matrix = _RowWriter(self._rows)
+                add_to_matrix(matrix, self._name_to_idx, ms.transactions[start:])
+                for kind, item in batch:
+                    if kind == "payment":
+                        payment = record_payment(ms, *item)
+                        add_payments_to_matrix(matrix, self._name_to_idx,
+                                               [((payment.payer, payment.payee), payment.amount)])
+            except Exception:
+                # All or nothing: the batch is dropped and ms goes back to the last commit,
+                # and its fingerprints are released so a retry is accepted
+                self._rollback(start, start_payments)
+                with self._seen_lock:
+                    self._queued_fps.difference_update(fps)
+                raise
+            self._rows = matrix.freeze()
+            with self._seen_lock:
+                self._queued_fps.difference_update(fps)
+                ms.fingerprints.update(fps)
+                ms.dedup["accepted"] += len(ms.transactions) - start
+
+            # Only the participants touched by this batch can have a new balance
+            touched = set()
+            for tx in ms.transactions[start:]:
+                touched.update(name for name in tx.checked_map if name in self._name_to_idx)
+                if tx.paid_by in self._name_to_idx:
+                    touched.add(tx.paid_by)
+            touched.update(name for kind, item in batch if kind == "payment" for name in item[:2])
+
+            old_net = self._snapshot.net
+            delta = {}
+            for name in touched:
+                i = self._name_to_idx[name]
+                change = ms.names_map[name].net_balance - old_net[i]
+                if change:
+                    delta[i] = change
+            transfer_changes = resettle_incremental(self._plan, delta)
+
+            self._snapshot = self._publish(self._snapshot.version + 1,
+                                           [self._name_to_idx[name] for name in touched])
+            names = ms.names
+            self._notify({
+                "version": self._snapshot.version,
+                "balances": {names[i]: ms.names_map[names[i]].net_balance for i in delta},
+                "transfers": [
+                    {"from": names[c["debtor"]], "to": names[c["creditor"]], "old": c["old"], "new": c["new"]}
+                    for c in transfer_changes
+                ],
+            })
+            return self._snapshot
+
+    def _rollback(self, start, start_payments):
+        ms = self.ms
+        del ms.transactions[start:]
+        del ms.payments[start_payments:]
+        ms.payment_totals = payment_totals(ms.payments)
+        new_compute_allocations(ms)
+
+    def close_period(self, cutoff, archive=False):
+        """
+        Close everything up to cutoff (see Dataclass/splitPeriods.close_period).
+        Balances and the transfer plan are unchanged; the matrix is rebuilt
+        from the carried pair debts plus the open transactions and payments.
+        With archive=True the closed transactions and payments are written
+        out with archive_period.
+        """
+        self.commit()
+        with self._commit_lock:
+            ms = self.ms
+            snapshot, closed, payments = close_period(ms, cutoff)
+            self.periods.append(snapshot)
+
+            matrix = np.zeros((len(ms.names), len(ms.names)))
+            add_opening_to_matrix(matrix, self._name_to_idx, snapshot.pair_debts.items())
+            add_to_matrix(matrix, self._name_to_idx, ms.transactions)
+            add_payments_to_matrix(matrix, self._name_to_idx, ms.payment_totals.items())
+            self._rows = _freeze_matrix(matrix)
+
+            path = None
+            if archive:
+                path = archive_period(snapshot, closed, payments, prefix=self.group_id)
+            self._snapshot = self._publish(self._snapshot.version + 1)
+            self._notify({"version": self._snapshot.version, "balances": {}, "transfers": [],
+                          "period": snapshot.period})
+            return snapshot, path
+
+    def _publish(self, version, touched=None):
+        # touched: indices whose cube rows may have changed; None republishes every row
+        previous = None if touched is None else self._snapshot.cube_rows
+        return LedgerSnapshot(
+            version=version,
+            committed_at=time.time(),
+            names=tuple(self.ms.names),
+            net=tuple(self.ms.names_map[name].net_balance for name in self.ms.names),
+            rows=self._rows,
+            cube_rows=cube_rows(self.ms.cube, touched, previous),
+            categories=tuple(self.ms.cube.categories),
+        )
+
+    # READS
+    def snapshot(self) -> LedgerSnapshot:
+        return self._snapshot
+
+    def transfer_plan(self):
+        """(snapshot, transfers) taken together, so the plan matches the snapshot version."""
+        with self._commit_lock:
+            names = self.ms.names
+            transfers = [{"from": names[d], "to": names[c], "amount": amt}
+                         for (d, c), amt in self._plan.amounts.items()]
+            return self._snapshot, transfers
+
+    # SUBSCRIPTIONS
+    def subscribe(self):
+        """Queue receiving one delta dict per commit; a subscriber that falls behind is dropped (gets None)."""
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._subscribers_lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._subscribers_lock:
+            self._subscribers.discard(q)
+
+    def _notify(self, event):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Too slow to keep up: drop it, the client reconnects and resyncs from a snapshot
+                self.unsubscribe(q)
+                try:
+                    q.get_nowait()
+                    q.put_nowait(None)
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+def _freeze_matrix(matrix):
+    matrix.flags.writeable = False
+    return tuple(matrix)
+
+
+# GROUP REGISTRY
+_groups: Dict[str, ConcurrentLedger] = {}
+_groups_lock = threading.Lock()
+
+
+def create_group(group_id, names, split_name=None) -> ConcurrentLedger:
+    with _groups_lock:
+        if group_id in _groups:
+            raise ValueError(f"Group '{group_id}' already exists.")
+        ledger = ConcurrentLedger(names, split_name, group_id=group_id)
+        _groups[group_id] = ledger
+        return ledger
+
+
+def get_group(group_id) -> Optional[ConcurrentLedger]:
+    return _groups.get(group_id)
@@ -0,0 +1,162 @@
+import json
+import os
+import time
+from dataclasses import asdict, is_dataclass
+
+from Dataclass.splitDataclass import PeriodSnapshot, new_compute_allocations, payment_totals, period_to_dict
+
+ARCHIVE_DIR = os.environ.get("MATRIX_UI_ARCHIVE", os.path.join("json", "archive"))   # git-ignored
+BALANCE_TOLERANCE = 0.005
+
+
+def _timestamp(tx):
+    return tx.get("timestamp") if isinstance(tx, dict) else tx.timestamp
+
+
+def _get(tx, key, default=None):
+    return tx.get(key, default) if isinstance(tx, dict) else getattr(tx, key, default)
+
+
+def unbalanced_transactions(transactions, names_map):
+    """
+    Problems that would make pair debts disagree with net balances: shares
+    for unknown participants, and uneven splits whose shares do not add up
+    to the amount. Skipped transactions (no shares) are fine, they count
+    for nobody. Returns [(tx position, message)].
+    """
+    problems = []
+    for i, tx in enumerate(transactions):
+        checked_map = _get(tx, "checked_map") or {}
+        if not checked_map or _get(tx, "paid_by") not in names_map:
+            continue
+        unknown = [name for name in checked_map if name not in names_map]
+        if unknown:
+            problems.append((i, f"unknown participant(s) {', '.join(map(str, unknown))}"))
+            continue
+        amount, shared = float(_get(tx, "amount")), sum(float(v) for v in checked_map.values())
+        if abs(amount - shared) > BALANCE_TOLERANCE:
+            problems.append((i, f"shares add up to {shared:.2f} of {amount:.2f}"))
+    return problems
+
+
+def _add_debt(debts, debtor, creditor, amount):
+    # Keep one direction per pair: a debt the other way is cancelled first
+    back = debts.pop((creditor, debtor), 0.0)
+    amount -= back
+    if amount > 0:
+        debts[(debtor, creditor)] = debts.get((debtor, creditor), 0.0) + amount
+    elif amount < 0:
+        debts[(creditor, debtor)] = -amount
+
+
+def pair_debts(opening, transactions, payment_totals, names_map):
+    """Netted (debtor, creditor) -> amount after the opening debts, transactions and payments."""
+    debts = {}
+    if opening is not None:
+        for (debtor, creditor), amount in opening.pair_debts.items():
+            _add_debt(debts, debtor, creditor, amount)
+    for tx in transactions:
+        paid_by = tx.get("paid_by") if isinstance(tx, dict) else tx.paid_by
+        checked_map = (tx.get("checked_map") if isinstance(tx, dict) else tx.checked_map) or {}
+        if paid_by not in names_map:
+            continue
+        for name, share in checked_map.items():
+            if name != paid_by and name in names_map:
+                _add_debt(debts, name, paid_by, float(share))
+    # A payment cancels debt, same as add_payments_to_matrix
+    for (payer, payee), amount in payment_totals.items():
+        _add_debt(debts, payee, payer, amount)
+    return debts
+
+
+def close_period(ms, cutoff, closed_at=None):
+    """
+    Close the period ending at cutoff (epoch seconds).
+
+      - Transactions and payments stamped at or before cutoff (and
+        unstamped ones) are folded into a new PeriodSnapshot of net
+        balances and netted pair debts; later ones stay open.
+      - ms keeps only the later transactions and ms.opening becomes the
+        snapshot, so net balances are unchanged. The index and category
+        cube are rebuilt and from then on cover the open period only.
+
+    ms must already be allocated. Raises ValueError, with ms untouched, when
+    a closing transaction cannot be carried as pair debts (see
+    unbalanced_transactions). Returns (snapshot, closed transactions, closed
+    payments) so the caller can archive them with archive_period.
+    """
+    if ms.opening is not None and ms.opening.cutoff is not None and cutoff < ms.opening.cutoff:
+        raise ValueError("Cutoff is before the last closed period.")
+    closed, kept = [], []
+    for tx in ms.transactions:
+        ts = _timestamp(tx)
+        (closed if ts is None or ts <= cutoff else kept).append(tx)
+    closed_payments, kept_payments = [], []
+    for p in ms.payments:
+        (closed_payments if p.timestamp is None or p.timestamp <= cutoff else kept_payments).append(p)
+
+    problems = unbalanced_transactions(closed, ms.names_map)
+    if problems:
+        raise ValueError("Cannot close the period: " + "; ".join(
+            f"transaction '{_get(closed[i], 'title')}': {message}" for i, message in problems))
+
+    # Balances at the cutoff: opening + closed transactions + closed payments
+    debts = pair_debts(ms.opening, closed, payment_totals(closed_payments), ms.names_map)
+    balances = {name: 0.0 for name in ms.names}
+    for (debtor, creditor), amount in debts.items():
+        balances[debtor] -= amount
+        balances[creditor] += amount
+
+    previous = ms.opening.period if ms.opening is not None else 0
+    snapshot = PeriodSnapshot(
+        period=previous + 1,
+        cutoff=float(cutoff),
+        closed_at=time.time() if closed_at is None else closed_at,
+        transaction_count=len(closed),
+        balances=balances,
+        pair_debts=debts,
+    )
+    ms.opening = snapshot
+    ms.transactions = kept
+    ms.payments = kept_payments
+    ms.payment_totals = payment_totals(kept_payments)
+    new_compute_allocations(ms)
+    return snapshot, closed, closed_payments
+
+
+def _as_dict(item):
+    return asdict(item) if is_dataclass(item) else dict(item)
+
+
+def check_archive_prefix(prefix):
+    # A separator would let the name escape the archive directory
+    if not prefix or any(sep in prefix for sep in ("/", "\\", "\0")):
+        raise ValueError(f"Invalid archive name {prefix!r}.")
+
+
+def archive_period(snapshot, transactions, payments, prefix="split", directory=None):
+    """
+    Write a closed period (snapshot + its transactions and payments) to
+    {prefix}-period-{n}.json in directory (ARCHIVE_DIR by default); returns the path. prefix should be
+    unique per ledger (ConcurrentLedger passes its group_id) and must be a
+    plain file name part: one with a path separator is rejected.
+    """
+    check_archive_prefix(prefix)
+    directory = directory or ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{prefix}-period-{snapshot.period}.json")
+    data = {
+        "snapshot": period_to_dict(snapshot),
+        "transactions": [_as_dict(tx) for tx in transactions],
+        "payments": [_as_dict(p) for p in payments],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load_archive(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,95 @@
+import csv
+import io
+from bisect import bisect_right
+
+from Dataclass.splitDataclass import statement_entry
+
+CSV_FIELDS = ["name", "tx_id", "title", "paid_by", "total_amount", "share"]
+
+
+def _selected_names(ms, names):
+    if names is None:
+        return list(ms.names)
+    unknown = [n for n in names if n not in ms.names_map]
+    if unknown:
+        raise KeyError(f"Unknown participant(s): {', '.join(unknown)}")
+    return list(names)
+
+
+def iter_statement_rows(ms, names=None, offset=0, limit=None):
+    """
+    Lazily yield one dict per (participant, share) statement row.
+
+    Rows are ordered by participant, then by transaction. Pagination seeks
+    straight to `offset` through the ledger index (O(participants) to find the
+    start, never O(transactions)), so a page costs proportional to its size.
+    A negative offset counts as 0 and a negative limit as an empty page.
+    """
+    offset = max(0, offset)
+    if limit is not None and limit <= 0:
+        return
+    names = _selected_names(ms, names)
+    by_participant = ms.index.by_participant
+
+    # cumulative row counts per participant, to locate the page start
+    ends = []
+    total = 0
+    for name in names:
+        total += len(by_participant.get(name, []))
+        ends.append(total)
+
+    k = bisect_right(ends, offset)
+    remaining = limit
+    start = offset - (ends[k - 1] if k else 0)
+    for name in names[k:]:
+        entries = by_participant.get(name, [])
+        stop = len(entries) if remaining is None else min(len(entries), start + remaining)
+        for tx_id, share in entries[start:stop]:
+            row = statement_entry(ms, tx_id, share)
+            row["name"] = name
+            yield row
+        if remaining is not None:
+            remaining -= stop - start
+            if remaining <= 0:
+                return
+        start = 0
+
+
+def iter_report_lines(ms, names=None, offset=0, limit=None):
+    """Yield the text report line by line: balances of the selected participants, then the statement page."""
+    selected = _selected_names(ms, names)
+    yield "========== MONEY SPLIT REPORT ==========\n"
+    yield f"Split Name : {ms.metadata.get('split_name', 'N/A')}\n"
+    yield "---- Balances ----\n"
+    for name in selected:
+        p = ms.names_map[name]
+        yield f"{name:<12} Paid {p.total_paid:10.2f} | Owed {p.total_owed:10.2f} | Net {p.net_balance:10.2f}\n"
+    yield "---- Statement ----\n"
+    for row in iter_statement_rows(ms, selected, offset, limit):
+        yield (f"{row['name']:<12} #{row['tx_id']:<6} {row['title'] or '':<20} | Paid by: {row['paid_by']} "
+               f"| Total Amount: {row['total_amount']} | Share: {row['share']:.2f}\n")
+
+
+def iter_csv_chunks(ms, names=None, offset=0, limit=None, header=True):
+    """Yield CSV text one row at a time (suitable for a streamed response)."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for row in iter_statement_rows(ms, names, offset, limit):
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def write_report(ms, path, names=None, offset=0, limit=None):
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(iter_report_lines(ms, names, offset, limit))
+
+
+def write_csv(ms, path, names=None, offset=0, limit=None):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.writelines(iter_csv_chunks(ms, names, offset, limit))
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from Dataclass.splitDataclass import parse_timestamp, is_even_split
+
+TOLERANCE = 1e-6
+
+MISSING_PAYER = -2
+UNKNOWN = -1
+
+
+@dataclass
+class ValidationReport:
+    row_count: int = 0
+    ok: bool = True
+    errors: List[Dict] = field(default_factory=list)   # {"row", "code", "field", "message"}
+
+
+def _get(tx, key, default=None):
+    if isinstance(tx, dict):
+        return tx.get(key, default)
+    return getattr(tx, key, default)
+
+
+def _as_float(value):
+    # Only real numbers: the allocator does arithmetic on these as given, so "12" is invalid
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return np.nan
+    return float(value)
+
+
+def _as_timestamp(value):
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        return np.nan
+
+
+def to_columns(transactions, names):
+    """
+    One pass from row objects to a columnar ledger:
+      - amount[r], payer[r] (participant index, -1 unknown, -2 missing), even[r]
+      - timestamp[r] (nan when missing or unparseable)
+      - participants as flat (row, idx, name) arrays
+      - explicit uneven shares as flat (row, idx, value, name) arrays
+    """
+    name_idx = {name: i for i, name in enumerate(names)}
+    m = len(transactions)
+    amount = np.empty(m)
+    amount_given = np.zeros(m, dtype=bool)
+    payer = np.empty(m, dtype=np.int64)
+    even = np.empty(m, dtype=bool)
+    timestamp = np.full(m, np.nan)
+    timestamp_given = np.zeros(m, dtype=bool)
+    part_row, part_idx, part_name = [], [], []
+    share_row, share_idx, share_val, share_name = [], [], [], []
+
+    for r, tx in enumerate(transactions):
+        raw_amount = _get(tx, "amount", _get(tx, "total_amount"))
+        amount_given[r] = raw_amount is not None
+        amount[r] = _as_float(raw_amount)
+        paid_by = _get(tx, "paid_by")
+        payer[r] = MISSING_PAYER if not paid_by else name_idx.get(paid_by, UNKNOWN)
+        detail = _get(tx, "uneven_split_map") or _get(tx, "detail_map") or {}
+        even[r] = is_even_split(_get(tx, "even_split", _get(tx, "toggle")), detail)
+        raw_ts = _get(tx, "timestamp")
+        if raw_ts is not None:
+            timestamp_given[r] = True
+            timestamp[r] = _as_timestamp(raw_ts)
+        for name in _get(tx, "checked_names") or []:
+            part_row.append(r)
+            part_idx.append(name_idx.get(name, UNKNOWN))
+            part_name.append(name)
+        for name, value in detail.items():
+            share_row.append(r)
+            share_idx.append(name_idx.get(name, UNKNOWN))
+            share_val.append(_as_float(value))
+            share_name.append(name)
+
+    return {
+        "rows": m,
+        "amount": amount,
+        "amount_given": amount_given,
+        "payer": payer,
+        "even": even,
+        "timestamp": timestamp,
+        "timestamp_given": timestamp_given,
+        "part_row": np.array(part_row, dtype=np.int64),
+        "part_idx": np.array(part_idx, dtype=np.int64),
+        "part_name": part_name,
+        "share_row": np.array(share_row, dtype=np.int64),
+        "share_idx": np.array(share_idx, dtype=np.int64),
+        "share_val": np.array(share_val, dtype=float),
+        "share_name": share_name,
+    }
+
+
+def validate_columns(cols):
+    """Run every check as a vectorized pass over the columnar ledger; returns a ValidationReport."""
+    m = cols["rows"]
+    amount, payer = cols["amount"], cols["payer"]
+    part_row, part_idx = cols["part_row"], cols["part_idx"]
+    share_row, share_idx, share_val = cols["share_row"], cols["share_idx"], cols["share_val"]
+    errors = []
+
+    def add_rows(mask, code, field_name, message):
+        for r in np.flatnonzero(mask):
+            errors.append({"row": int(r), "code": code, "field": field_name, "message": message})
+
+    def add_entries(mask, rows, entry_names, code, field_name, message):
+        for k in np.flatnonzero(mask):
+            errors.append({"row": int(rows[k]), "code": code, "field": field_name,
+                           "message": message.format(name=entry_names[k])})
+
+    # Row-level checks
+    add_rows(~cols["amount_given"], "missing", "amount", "Amount is missing.")
+    add_rows(cols["amount_given"] & np.isnan(amount), "invalid", "amount", "Amount is not a number.")
+    add_rows(amount < 0, "negative", "amount", "Amount is negative.")
+    add_rows(payer == MISSING_PAYER, "missing", "paid_by", "Payer is missing.")
+    add_rows(payer == UNKNOWN, "unknown_payer", "paid_by", "Payer is not a participant.")
+    add_rows(cols["timestamp_given"] & np.isnan(cols["timestamp"]), "invalid", "timestamp", "Timestamp is not a valid time.")
+    add_rows(np.bincount(part_row, minlength=m) == 0, "missing", "checked_names", "No participants selected.")
+
+    # Entry-level checks
+    add_entries(part_idx == UNKNOWN, part_row, cols["part_name"],
+                "unknown_participant", "checked_names", "'{name}' is not a participant.")
+    add_entries(share_idx == UNKNOWN, share_row, cols["share_name"],
+                "unknown_participant", "uneven_split_map", "'{name}' is not a participant.")
+    add_entries(np.isnan(share_val), share_row, cols["share_name"],
+                "invalid", "uneven_split_map", "Share of '{name}' is not a number.")
+    add_entries(share_val < 0, share_row, cols["share_name"],
+                "negative", "uneven_split_map", "Share of '{name}' is negative.")
+
+    # Explicit shares of an uneven split must fit in the amount
+    explicit = np.bincount(share_row, weights=np.nan_to_num(share_val), minlength=m)
+    add_rows(~cols["even"] & (explicit > amount + TOLERANCE), "shares_exceed_amount", "uneven_split_map",
+             "Explicit shares add up to more than the amount.")
+
+    errors.sort(key=lambda e: e["row"])
+    return ValidationReport(row_count=m, ok=not errors, errors=errors)
+
+
+def validate_ledger(transactions, names):
+    """Validate a whole list of transactions (dicts or Transaction objects) against the participant names."""
+    return validate_columns(to_columns(list(transactions), list(names)))
@@ -1,9 +1,11 @@
 from flask import Flask
 from routes import bp as main_bp
+from profiling import install_profiler
 
 def create_app():
     app = Flask(__name__)
     app.register_blueprint(main_bp)
+    install_profiler(app)
     return app
 
 if __name__ == "__main__":
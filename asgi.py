@@ -0,0 +1,132 @@
+# asgi.py
+# Async entry point: `uvicorn asgi:app`. POST /matrix is served natively (parse and
+# validate on the event loop, compute + render in a bounded pool, identical concurrent
+# submissions coalesced); every other route is the Flask app behind asgiref's WsgiToAsgi.
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import render_template
+from werkzeug.datastructures import MultiDict
+
+from app import create_app
+from ops import PAYLOAD_ERRORS, payload_error, parse_submission, build_matrix
+from matrix_store import put_matrix
+from routes import FULL_RENDER_LIMIT
+from Dataclass.splitValidate import validate_ledger
+
+MAX_WORKERS = int(os.environ.get("MATRIX_UI_WORKERS", os.cpu_count() or 1))
+EXECUTOR = os.environ.get("MATRIX_UI_EXECUTOR", "thread")   # "thread" or "process"
+MAX_BODY = 16 * 1024 * 1024
+
+flask_app = create_app()
+wsgi_app = WsgiToAsgi(flask_app)
+
+_pool = None
+_inflight = {}   # body hash -> asyncio.Future shared by identical submissions
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        pool_cls = ProcessPoolExecutor if EXECUTOR == "process" else ThreadPoolExecutor
+        _pool = pool_cls(max_workers=MAX_WORKERS)
+    return _pool
+
+
+def compute_matrix_page(colnames, rows):
+    """CPU-heavy part of POST /matrix: build and store the matrix, render the page. Runs in the pool."""
+    matrix, _ = build_matrix(rows, colnames)
+    key = put_matrix(colnames, matrix)
+    tiled = len(colnames) > FULL_RENDER_LIMIT
+    with flask_app.test_request_context("/matrix", method="POST"):
+        return render_template(
+            "matrix.html",
+            colnames=colnames,
+            matrix=None if tiled else matrix,
+            matrix_key=key,
+            tiled=tiled
+        )
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise PayloadTooLarge(f"Request body larger than {MAX_BODY} bytes.")
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send(send, status, body, content_type):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def matrix_endpoint(scope, receive, send):
+    # Parsing and validation stay on the event loop
+    try:
+        body = await _read_body(receive)
+    except PayloadTooLarge as e:
+        await _send(send, 413, str(e).encode(), b"text/plain; charset=utf-8")
+        return
+    try:
+        headers = dict(scope.get("headers", []))
+        if headers.get(b"content-type", b"").split(b";")[0].strip() == b"application/json":
+            size, colnames, rows = parse_submission(json.loads(body), True)
+        else:
+            size, colnames, rows = parse_submission(
+                MultiDict(parse_qsl(body.decode("utf-8"), keep_blank_values=True)), False)
+    except PAYLOAD_ERRORS as e:
+        # Same mapping as routes.matrix_view
+        await _send(send, 400, payload_error(e).encode(), b"text/plain; charset=utf-8")
+        return
+    report = validate_ledger(rows, colnames)
+    if not report.ok:
+        await _send(send, 400, json.dumps(asdict(report)).encode(), b"application/json")
+        return
+
+    # Identical concurrent submissions share one computation
+    key = hashlib.sha1(body).hexdigest()
+    fut = _inflight.get(key)
+    if fut is None:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(_get_pool(), compute_matrix_page, colnames, rows)
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    html = await asyncio.shield(fut)
+    await _send(send, 200, html.encode("utf-8"), b"text/html; charset=utf-8")
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _pool is not None:
+                    _pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] == "http" and scope["path"] == "/matrix" and scope["method"] == "POST":
+        await matrix_endpoint(scope, receive, send)
+        return
+    await wsgi_app(scope, receive, send)
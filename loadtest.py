@@ -0,0 +1,257 @@
+# loadtest.py
+# Load generator for POST /matrix. Builds realistic submissions in the two
+# formats the route accepts (parse_form fields and the compact JSON of
+# parse_json_payload), fires them at a fixed concurrency, and reports
+# p50/p95/p99 latency, throughput and peak RSS per group size. Each size runs in
+# a fresh process, so its peak RSS is its own (ru_maxrss never goes down).
+#
+#   python loadtest.py --sizes 10 50 200 --requests 200 --concurrency 8
+#   python loadtest.py --url http://127.0.0.1:5000 --format form
+#   python loadtest.py --save json/loadtest_baseline.json     (record a baseline)
+#   python loadtest.py --check json/loadtest_baseline.json    (exit 1 on regression)
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = [10, 50, 200]
+DEFAULT_BASELINE = "json/loadtest_baseline.json"
+TOLERANCE = 1.5   # a size regresses when p95 grows, or throughput shrinks, by more than this factor
+
+
+# PAYLOADS
+def _rows(size, row_count, rng):
+    """Random expense rows as (title, amount, payer idx, uneven, checked idx, {idx: amount})."""
+    rows = []
+    for i in range(row_count):
+        checked = sorted(rng.sample(range(size), rng.randint(min(2, size), min(8, size))))
+        amount = round(rng.uniform(10, 500), 2)
+        uneven = rng.random() < 0.2
+        detail = {}
+        if uneven:
+            # Explicit shares for about half the participants, leaving room for the rest
+            for j in checked[: len(checked) // 2]:
+                detail[j] = round(amount / (2 * len(checked)), 2)
+        rows.append((f"Expense {i + 1}", amount, rng.choice(checked), uneven, checked, detail))
+    return rows
+
+
+def form_payload(size, row_count, seed=0):
+    """Field dict in the scheme parse_form reads (size, row_count, colname_j, chk_i_j, ...)."""
+    rng = random.Random(seed)
+    names = [f"P{j}" for j in range(1, size + 1)]
+    form = {"size": str(size), "row_count": str(row_count)}
+    for j, name in enumerate(names, start=1):
+        form[f"colname_{j}"] = name
+    for i, (title, amount, payer, uneven, checked, detail) in enumerate(_rows(size, row_count, rng), start=1):
+        form[f"title_{i}"] = title
+        form[f"amount_{i}"] = str(amount)
+        form[f"paidby_{i}"] = names[payer]
+        if uneven:
+            form[f"toggle_{i}"] = "on"
+        for j in checked:
+            form[f"chk_{i}_{j + 1}"] = "on"
+        for j, value in detail.items():
+            form[f"detail_{i}_{j + 1}"] = str(value)
+    return form
+
+
+def json_payload(size, row_count, seed=0):
+    """Compact submission in the format parse_json_payload reads."""
+    rng = random.Random(seed)
+    return {
+        "names": [f"P{j}" for j in range(1, size + 1)],
+        "rows": [
+            {"title": title, "amount": amount, "paid_by": payer, "toggle": uneven,
+             "checked": checked, "detail": [[j, v] for j, v in detail.items()]}
+            for title, amount, payer, uneven, checked, detail in _rows(size, row_count, rng)
+        ],
+    }
+
+
+def encode(payload, fmt):
+    """(body bytes, content type) for one payload."""
+    if fmt == "json":
+        return json.dumps(payload).encode("utf-8"), "application/json"
+    return urllib.parse.urlencode(payload).encode("utf-8"), "application/x-www-form-urlencoded"
+
+
+# DRIVERS
+class ClientDriver:
+    """Calls the app in-process through Flask's test client (one client per thread)."""
+
+    def __init__(self):
+        from app import create_app
+        self.app = create_app()
+        self._local = threading.local()
+
+    def post(self, path, body, content_type):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.post(path, data=body, content_type=content_type).status_code
+
+
+class HttpDriver:
+    """Calls a running server (python app.py, uvicorn asgi:app, ...) over HTTP."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def post(self, path, body, content_type):
+        req = urllib.request.Request(self.url + path, data=body, headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(req) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+# MEASUREMENT
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process over its whole life (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(driver, size, requests, concurrency, fmt, rows_per_person=2, variants=8):
+    """Fire `requests` submissions for one group size; returns its result row."""
+    builder = json_payload if fmt == "json" else form_payload
+    bodies = [encode(builder(size, size * rows_per_person, seed), fmt) for seed in range(variants)]
+    driver.post("/matrix", *bodies[0])   # warm-up, not measured
+
+    def one(k):
+        start = time.perf_counter()
+        status = driver.post("/matrix", *bodies[k % variants])
+        return time.perf_counter() - start, status
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - wall
+
+    latencies = sorted(t for t, _ in results)
+    return {
+        "size": size,
+        "format": fmt,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, status in results if status != 200),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": requests / wall if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def make_driver(url=None):
+    return HttpDriver(url) if url else ClientDriver()
+
+
+def run_size_isolated(url, size, requests, concurrency, fmt):
+    """run_size in a fresh (spawned) process, so peak_rss_mb covers this size only."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_size_in_child, url, size, requests, concurrency, fmt).result()
+
+
+def _run_size_in_child(url, size, requests, concurrency, fmt):
+    return run_size(make_driver(url), size, requests, concurrency, fmt)
+
+
+def print_results(results, rss_label):
+    print(f"{'Size':>6}{'Fmt':>6}{'Req':>6}{'Conc':>6}{'Err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'req/s':>9}{'RSS MB':>9}")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:9.1f}" if r["peak_rss_mb"] is not None else f"{'-':>9}"
+        print(f"{r['size']:>6}{r['format']:>6}{r['requests']:>6}{r['concurrency']:>6}{r['errors']:>5}"
+              f"{r['p50_ms']:10.1f}{r['p95_ms']:10.1f}{r['p99_ms']:10.1f}{r['throughput_rps']:9.1f}{rss}")
+    print(f"(peak RSS is of the {rss_label})")
+
+
+# BASELINES
+def save_baseline(results, path):
+    with open(path, "w") as f:
+        json.dump({"saved_at": time.time(), "results": results}, f, indent=2)
+
+
+def check_baseline(results, path, tolerance=TOLERANCE):
+    """Compare against a saved baseline; returns a list of regression messages."""
+    with open(path) as f:
+        baseline = {(r["size"], r["format"]): r for r in json.load(f)["results"]}
+    problems = []
+    for r in results:
+        base = baseline.get((r["size"], r["format"]))
+        if base is None:
+            continue
+        if r["errors"] > base["errors"]:
+            problems.append(f"size {r['size']}: {r['errors']} errors (baseline {base['errors']})")
+        if r["p95_ms"] > base["p95_ms"] * tolerance:
+            problems.append(f"size {r['size']}: p95 {r['p95_ms']:.1f} ms (baseline {base['p95_ms']:.1f} ms)")
+        if base["throughput_rps"] and r["throughput_rps"] < base["throughput_rps"] / tolerance:
+            problems.append(f"size {r['size']}: {r['throughput_rps']:.1f} req/s "
+                            f"(baseline {base['throughput_rps']:.1f} req/s)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test POST /matrix.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="group sizes (participants)")
+    parser.add_argument("--requests", type=int, default=100, help="requests per size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--format", choices=["json", "form"], default="json")
+    parser.add_argument("--url", help="base URL of a running server; default: in-process test client")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="store the results as a baseline")
+    parser.add_argument("--check", nargs="?", const=DEFAULT_BASELINE, help="compare against a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--same-process", action="store_true",
+                        help="run every size in this process (faster; peak RSS is then cumulative)")
+    args = parser.parse_args(argv)
+
+    if args.same_process:
+        driver = make_driver(args.url)
+        results = [run_size(driver, size, args.requests, args.concurrency, args.format) for size in args.sizes]
+    else:
+        results = [run_size_isolated(args.url, size, args.requests, args.concurrency, args.format)
+                   for size in args.sizes]
+    label = "load generator" if args.url else "load generator + app"
+    print_results(results, label + (", cumulative over sizes" if args.same_process else ", one process per size"))
+
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"Baseline saved to {args.save}")
+    if args.check:
+        problems = check_baseline(results, args.check, args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,13 @@ import numpy as np
 import networkx as nx
 from copy import deepcopy
 
+try:
+    from logic.split_render import get_layout
+except ImportError:
+    # Run directly as a script (python logic/SplittrHub.py): no package path, no shared cache
+    def get_layout(labels, G):
+        return nx.spring_layout(G)
+
 # Utility to pretty-print adjacency matrix with labels
 # Calls summary printer at the end
 def print_matrix(mat, labels):
@@ -44,8 +51,8 @@ def build_graph(mat, labels):
 
 def print_graph(G):
     import matplotlib.pyplot as plt
-    # Compute layout
-    pos = nx.spring_layout(G)
+    # Layout is computed once per participant set and reused across steps
+    pos = get_layout(list(G.nodes), G)
     plt.figure(figsize=(6, 6))
     # Draw nodes and labels
     nx.draw_networkx_nodes(G, pos, node_size=700)
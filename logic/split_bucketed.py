@@ -0,0 +1,100 @@
+import numpy as np
+
+from logic.split_constrained import CENTS, to_cents
+
+
+def exact_pairs(d_amt, c_amt):
+    """
+    Pair debtors and creditors with identical amounts, vectorized.
+    The k-th debtor and k-th creditor holding the same value are paired.
+    Returns (debtor positions, creditor positions) into d_amt / c_amt.
+    """
+    d_order = np.argsort(d_amt, kind="stable")
+    c_order = np.argsort(c_amt, kind="stable")
+    ds, cs = d_amt[d_order], c_amt[c_order]
+    # Rank of each debtor inside its run of equal values
+    rank = np.arange(ds.size) - np.searchsorted(ds, ds, side="left")
+    pos = np.searchsorted(cs, ds, side="left") + rank
+    ok = pos < cs.size
+    ok[ok] = cs[pos[ok]] == ds[ok]
+    return d_order[ok], c_order[pos[ok]]
+
+
+def magnitude_order(amt):
+    """Positions ordered by magnitude bucket (bit length), largest first, via radix sort on uint8 keys."""
+    bucket = (np.int64(63) - np.floor(np.log2(amt)).astype(np.int64)).astype(np.uint8)
+    return np.argsort(bucket, kind="stable")
+
+
+def sweep(d_amt, c_amt):
+    """
+    Match two sequences with equal totals in one vectorized pass.
+    Breakpoints are the union of both cumulative sums. Each gap between
+    breakpoints is one transfer, from the debtor and to the creditor whose
+    running totals cover it. Gives at most len(d) + len(c) - 1 transfers.
+    Returns (debtor positions, creditor positions, amounts).
+    """
+    if d_amt.size == 0 or c_amt.size == 0:
+        # Nothing left to match (everything was paired, or all balances are zero)
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.asarray(d_amt).dtype)
+    A, C = np.cumsum(d_amt), np.cumsum(c_amt)
+    # Two sorted runs: the stable sort merges them in linear time
+    points = np.sort(np.concatenate((A, C)), kind="stable")
+    points = points[np.concatenate(([True], np.diff(points) > 0))]
+    amounts = np.diff(np.concatenate(([0], points)))
+    return np.searchsorted(A, points, side="left"), np.searchsorted(C, points, side="left"), amounts
+
+
+def settle_bucketed(net):
+    """
+    Approximate settlement of a net-balance vector (net = to get - to give)
+    for very large groups, with no Python-level loop over participants:
+      - Balances in integer cents, so every balance is settled exactly.
+      - Equal debtor/creditor amounts are paired first.
+      - The rest are ordered by magnitude bucket (counting/radix sort on
+        the bit length) and matched with one cumulative-sum sweep, so
+        similar amounts meet and breakpoints often coincide.
+    Returns (payer, payee, amount, stats): index arrays, amounts in currency
+    units, and stats with the transfer count against the n - 1 bound.
+    """
+    cents = to_cents(net)
+    debtors = np.flatnonzero(cents < 0)
+    creditors = np.flatnonzero(cents > 0)
+    d_amt, c_amt = -cents[debtors], cents[creditors]
+
+    dp, cp = exact_pairs(d_amt, c_amt)
+    d_left = np.ones(debtors.size, dtype=bool)
+    c_left = np.ones(creditors.size, dtype=bool)
+    d_left[dp] = False
+    c_left[cp] = False
+    debtors_r, creditors_r = debtors[d_left], creditors[c_left]
+    d_r, c_r = d_amt[d_left], c_amt[c_left]
+
+    d_order, c_order = magnitude_order(d_r), magnitude_order(c_r)
+    sd, sc, sa = sweep(d_r[d_order], c_r[c_order])
+
+    payer = np.concatenate((debtors[dp], debtors_r[d_order][sd]))
+    payee = np.concatenate((creditors[cp], creditors_r[c_order][sc]))
+    amount = np.concatenate((d_amt[dp], sa)) / CENTS
+
+    nonzero = debtors.size + creditors.size
+    bound = max(nonzero - 1, 0)
+    stats = {
+        "participants": int(cents.size),
+        "nonzero": int(nonzero),
+        "exact_pairs": int(dp.size),
+        "transfers": int(payer.size),
+        "bound": int(bound),
+        "extra": int(payer.size - bound),   # negative: fewer than the n - 1 bound
+    }
+    return payer, payee, amount, stats
+
+
+def settle_bucketed_matrix(matrix, labels):
+    """settle_bucketed on an owe matrix; returns M where M[i, j] is what labels[i] pays labels[j]."""
+    M = np.asarray(matrix, dtype=float)
+    payer, payee, amount, _ = settle_bucketed(M.sum(axis=0) - M.sum(axis=1))
+    out = np.zeros_like(M)
+    np.add.at(out, (payer, payee), amount)
+    return out
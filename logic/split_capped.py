@@ -0,0 +1,201 @@
+from bisect import bisect_right, insort
+
+import numpy as np
+
+from logic.split_constrained import CENTS, net_in_cents
+
+SEARCH_LIMIT = 12   # non-zero balances up to which an exact search backs up the greedy pass
+
+
+def _caps(cap, labels):
+    """Per-participant cap list from None (no cap), an int, or a {label: int} dict."""
+    n = len(labels)
+    if cap is None:
+        return [n] * n
+    if isinstance(cap, dict):
+        return [int(cap.get(label, n)) for label in labels]
+    return [int(cap)] * n
+
+
+def check_caps(net, labels, out_caps, in_caps):
+    """
+    Quick necessary conditions, O(n log n); raises ValueError when one fails:
+      - everyone with a balance can send (or receive) at least one transfer,
+      - the debtors' outgoing slots cover every creditor and vice versa,
+      - a debtor with cap k owes no more than the k largest credits add up to
+        (and the same for creditors).
+    """
+    debtors = np.flatnonzero(net < 0)
+    creditors = np.flatnonzero(net > 0)
+    for side, caps, word in ((debtors, out_caps, "outgoing"), (creditors, in_caps, "incoming")):
+        for i in side:
+            if caps[i] < 1:
+                raise ValueError(f"{labels[i]} has a balance but no {word} transfers allowed.")
+    if sum(out_caps[i] for i in debtors) < len(creditors):
+        raise ValueError("Not enough outgoing transfers allowed to reach every creditor.")
+    if sum(in_caps[i] for i in creditors) < len(debtors):
+        raise ValueError("Not enough incoming transfers allowed to pay every debtor.")
+
+    for side, other, caps in ((debtors, creditors, out_caps), (creditors, debtors, in_caps)):
+        top = np.concatenate(([0], np.cumsum(np.sort(np.abs(net[other]))[::-1])))
+        k = np.minimum([caps[i] for i in side], len(other)).astype(np.int64)
+        short = np.flatnonzero(np.abs(net[side]) > top[k])
+        if short.size:
+            i = side[short[0]]
+            raise ValueError(f"{labels[i]} cannot be settled within {caps[i]} transfers.")
+
+
+def _search_capped(net, cap):
+    """
+    Exact search for a capped plan, small inputs only. Some feasible plan
+    (if any) is a forest, and a forest can be peeled leaf by leaf: every
+    step closes one party in a single transfer to a counterpart owed at
+    least as much. Trying every such step finds a plan whenever one exists;
+    failed states are remembered by their (amount, cap) multiset.
+    Returns [(debtor, creditor, cents)], or None when the caps cannot be met.
+    """
+    failed = set()   # multisets of open (amount, cap) with no plan; indices do not matter
+
+    def hopeless(open_):
+        # The check_caps conditions, on what is still open
+        debtors = [(-a, c) for a, c in open_.values() if a < 0]
+        creditors = [(a, c) for a, c in open_.values() if a > 0]
+        for side, other in ((debtors, creditors), (creditors, debtors)):
+            if sum(c for _, c in side) < len(other):
+                return True
+            top = np.concatenate(([0], np.cumsum(sorted((a for a, _ in other), reverse=True))))
+            if any(a > top[min(c, len(other))] for a, c in side):
+                return True
+        return False
+
+    def solve(open_):
+        if not open_:
+            return []
+        key = tuple(sorted(open_.values()))
+        if key in failed:
+            return None
+        if not hopeless(open_):
+            # A party with one slot left is a leaf in every plan: only its counterpart is open
+            leaves = [s for s, (_, c) in open_.items() if c == 1]
+            tried = set()
+            for s in leaves[:1] or list(open_):
+                amount = open_[s][0]
+                for o, (o_amount, o_cap) in open_.items():
+                    # Opposite sides only; o must have a slot left if it stays open
+                    if (amount < 0) == (o_amount < 0) or abs(o_amount) < abs(amount):
+                        continue
+                    if o_cap < (1 if o_amount == -amount else 2):
+                        continue
+                    if (open_[s], open_[o]) in tried:
+                        continue
+                    tried.add((open_[s], open_[o]))
+                    rest = dict(open_)
+                    del rest[s]
+                    if o_amount == -amount:
+                        del rest[o]
+                    else:
+                        rest[o] = (o_amount + amount, o_cap - 1)
+                    plan = solve(rest)
+                    if plan is not None:
+                        step = (s, o, -amount) if amount < 0 else (o, s, amount)
+                        return [step] + plan
+        failed.add(key)
+        return None
+
+    return solve({i: (int(net[i]), cap[i]) for i in np.flatnonzero(net) if cap[i] >= 1})
+
+
+def settle_capped(matrix, labels, max_out=None, max_in=None):
+    """
+    Settlement with at most max_out outgoing and max_in incoming transfers
+    per participant (an int for everyone, or a {label: int} dict):
+      - Balances in integer cents, so every balance is settled exactly.
+      - Equal debtor/creditor amounts are paired first (one transfer closes both).
+      - Then repeatedly take the smallest open balance and close it in one
+        transfer with the best-fitting counterpart (smallest amount >= it)
+        that has a slot to spare; if none can take it, pay off the largest
+        smaller counterpart instead, which spends one of its own slots.
+    Every transfer closes at least one party, so the plan has at most
+    (debtors + creditors - 1) transfers. Open balances sit in lists sorted
+    largest first, so the smallest pops off the end in O(1) and best fits
+    are found with bisect.
+    The greedy pass can miss a plan that exists. When it gets stuck and the
+    group has at most SEARCH_LIMIT non-zero balances, an exact search
+    (_search_capped) over the whole group decides; ValueError then means the
+    caps cannot be met. Above that size ValueError only means the greedy
+    pass found no plan.
+    Returns M where M[i, j] is what labels[i] pays labels[j].
+    """
+    labels = list(labels)
+    n = len(labels)
+    net = net_in_cents(matrix)
+    out_caps, in_caps = _caps(max_out, labels), _caps(max_in, labels)
+    check_caps(net, labels, out_caps, in_caps)
+
+    M = np.zeros((n, n))
+    cap = {}
+    for i in range(n):
+        cap[i] = out_caps[i] if net[i] < 0 else in_caps[i]
+    start_cap = dict(cap)
+
+    def pay(debtor, creditor, amount):
+        M[debtor, creditor] += amount / CENTS
+        cap[debtor] -= 1
+        cap[creditor] -= 1
+
+    def stuck(s):
+        if np.count_nonzero(net) <= SEARCH_LIMIT:
+            plan = _search_capped(net, start_cap)
+            if plan is None:
+                raise ValueError("No settlement meets the transfer caps.")
+            M[:] = 0
+            for debtor, creditor, amount in plan:
+                M[debtor, creditor] += amount / CENTS
+            return M
+        raise ValueError(f"No plan found by the greedy pass: {labels[s]} cannot be settled "
+                         f"within the transfer caps.")
+
+    # Exact pairs
+    waiting = {}
+    creditors = []
+    for i in np.flatnonzero(net < 0):
+        waiting.setdefault(int(-net[i]), []).append(int(i))
+    for j in np.flatnonzero(net > 0):
+        amount = int(net[j])
+        if waiting.get(amount):
+            pay(waiting[amount].pop(), int(j), amount)
+        else:
+            creditors.append((amount, int(j)))
+    # Open balances as (-amount, idx), sorted: largest first, smallest last
+    debtors = sorted((-amount, i) for amount, idx in waiting.items() for i in idx)
+    creditors = sorted((-amount, j) for amount, j in creditors)
+
+    while debtors and creditors:
+        # Smallest open balance on either side
+        if debtors[-1][0] >= creditors[-1][0]:
+            small, other, small_is_debtor = debtors, creditors, True
+        else:
+            small, other, small_is_debtor = creditors, debtors, False
+        key, s = small.pop()
+        amount = -key
+
+        # Best fit that can absorb it and still close later: other[:p] are >= amount, smallest last
+        p = bisect_right(other, (key, n))
+        k = p - 1
+        while k >= 0 and not (cap[other[k][1]] >= 2 or other[k][0] == key):
+            k -= 1
+        if k >= 0:
+            o_key, o = other.pop(k)
+            pay(*((s, o) if small_is_debtor else (o, s)), amount)
+            if o_key < key:
+                insort(other, (o_key - key, o))
+            continue
+
+        # Nobody can take it whole: close the largest smaller counterpart, other[p]
+        if p == len(other) or cap[s] < 2:
+            return stuck(s)
+        o_key, o = other.pop(p)
+        pay(*((s, o) if small_is_debtor else (o, s)), -o_key)
+        insort(small, (key - o_key, s))
+
+    return M
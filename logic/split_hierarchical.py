@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from logic.split_logics import remove_self_loops, reduce_bidirectional
+
+EPS = 1e-9
+
+
+def greedy_transfers(net):
+    """
+    Greedy matching on a net vector (net = to get - to give, sums to ~0):
+    largest payer with largest receiver until one side runs out.
+    Returns [(payer_pos, receiver_pos, amount)] in positions of net.
+    """
+    payers = sorted(((-v, i) for i, v in enumerate(net) if v < -EPS), reverse=True)
+    receivers = sorted(((v, i) for i, v in enumerate(net) if v > EPS), reverse=True)
+    transfers = []
+    p = q = 0
+    p_amt = payers[0][0] if payers else 0.0
+    q_amt = receivers[0][0] if receivers else 0.0
+    while p < len(payers) and q < len(receivers):
+        x = min(p_amt, q_amt)
+        transfers.append((payers[p][1], receivers[q][1], float(x)))
+        p_amt -= x
+        q_amt -= x
+        if p_amt <= EPS:
+            p += 1
+            p_amt = payers[p][0] if p < len(payers) else 0.0
+        if q_amt <= EPS:
+            q += 1
+            q_amt = receivers[q][0] if q < len(receivers) else 0.0
+    return transfers
+
+
+def build_clusters(labels, clusters, representatives=None, net=None):
+    """
+    Group participant indices by cluster id and pick one representative each.
+
+      - clusters maps label -> cluster id; unmapped labels are their own cluster.
+      - representatives maps cluster id -> label; by default the member with
+        the largest |net| (the one whose balance moves the least).
+    Returns [(members, rep)] with member indices in label order.
+    """
+    representatives = representatives or {}
+    groups = {}
+    for i, label in enumerate(labels):
+        groups.setdefault(clusters.get(label, ("__self__", label)), []).append(i)
+
+    out = []
+    for cid, members in groups.items():
+        rep_label = representatives.get(cid)
+        if rep_label is not None:
+            if rep_label not in labels or labels.index(rep_label) not in members:
+                raise ValueError(f"Representative '{rep_label}' is not a member of cluster '{cid}'.")
+            rep = labels.index(rep_label)
+        elif net is not None:
+            rep = max(members, key=lambda i: abs(net[i]))
+        else:
+            rep = members[0]
+        out.append((members, rep))
+    return out
+
+
+def settle_cluster(members, rep, member_net):
+    """
+    Settle inside one cluster so only the representative keeps a balance:
+    the rep's internal target is the whole cluster total. Returns
+    ([(payer_idx, receiver_idx, amount)], cluster total).
+    """
+    total = float(sum(member_net))
+    internal = list(member_net)
+    internal[members.index(rep)] -= total
+    transfers = [(members[a], members[b], x) for a, b, x in greedy_transfers(internal)]
+    return transfers, total
+
+
+def _settle_chunk(chunk):
+    # One worker settles many clusters, so only one result list is pickled back
+    return [settle_cluster(members, rep, member_net) for members, rep, member_net in chunk]
+
+
+def settle_hierarchical(matrix, labels, clusters, representatives=None, workers=None):
+    """
+    Two-level settlement for groups made of households or sub-teams:
+      - Net balances as in settle_greedy (incoming minus outgoing).
+      - Inside each cluster (in parallel): members settle with each other
+        until only the representative carries the cluster's total.
+      - Between clusters: greedy on the k-entry vector of cluster totals,
+        paid representative to representative.
+    Returns (M, transfers): M[i, j] is what labels[i] pays labels[j]; transfers
+    lists {"from", "to", "amount", "level"} with intra-cluster ones first.
+    """
+    labels = list(labels)
+    M = np.asarray(matrix, dtype=float)
+    net = M.sum(axis=0) - M.sum(axis=1)
+    groups = build_clusters(labels, clusters, representatives, net)
+    jobs = [(members, rep, [float(net[i]) for i in members]) for members, rep in groups if len(members) > 1]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        results = _settle_chunk(jobs)
+    else:
+        chunks = [jobs[k::workers] for k in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_settle_chunk, chunks))
+        # Undo the round-robin split so results line up with jobs
+        results = [None] * len(jobs)
+        for k, part in enumerate(parts):
+            results[k::workers] = part
+
+    out = np.zeros_like(M)
+    transfers = []
+    totals = {rep: float(net[rep]) for members, rep in groups}   # singleton clusters: own balance
+    for (members, rep, _), (cluster_transfers, total) in zip(jobs, results):
+        totals[rep] = total
+        for a, b, x in cluster_transfers:
+            out[a, b] += x
+            transfers.append({"from": labels[a], "to": labels[b], "amount": x, "level": "cluster"})
+
+    reps = list(totals)
+    for a, b, x in greedy_transfers([totals[r] for r in reps]):
+        out[reps[a], reps[b]] += x
+        transfers.append({"from": labels[reps[a]], "to": labels[reps[b]], "amount": x, "level": "representative"})
+    return out, transfers
+
+
+def process_matrix_hierarchical(mat, labels, clusters, representatives=None, workers=None):
+    """process_matrix with the hierarchical strategy as its last step."""
+    mat1 = remove_self_loops(mat)
+    mat2 = reduce_bidirectional(mat1, labels)
+    return settle_hierarchical(mat2, labels, clusters, representatives, workers)
@@ -0,0 +1,154 @@
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+EPS = 1e-9
+
+
+@dataclass
+class TransferPlan:
+    # (debtor, creditor) -> amount, plus adjacency so a participant's transfers are found without a scan
+    amounts: Dict[Tuple[int, int], float] = field(default_factory=dict)
+    outgoing: Dict[int, Dict[int, float]] = field(default_factory=dict)   # debtor -> {creditor: amount}
+    incoming: Dict[int, Dict[int, float]] = field(default_factory=dict)   # creditor -> {debtor: amount}
+
+
+def set_transfer(plan, debtor, creditor, amount, changes=None):
+    """Set one transfer (removing it when ~0), recording (old, new) in changes."""
+    key = (debtor, creditor)
+    old = plan.amounts.get(key, 0.0)
+    if changes is not None:
+        changes.setdefault(key, [old, old])[1] = amount if amount > EPS else 0.0
+    if amount > EPS:
+        plan.amounts[key] = amount
+        plan.outgoing.setdefault(debtor, {})[creditor] = amount
+        plan.incoming.setdefault(creditor, {})[debtor] = amount
+    elif key in plan.amounts:
+        del plan.amounts[key]
+        del plan.outgoing[debtor][creditor]
+        del plan.incoming[creditor][debtor]
+
+
+def plan_from_matrix(M):
+    plan = TransferPlan()
+    M = np.asarray(M, dtype=float)
+    for i, j in zip(*np.nonzero(M)):
+        if i != j:
+            set_transfer(plan, int(i), int(j), float(M[i, j]))
+    return plan
+
+def plan_to_matrix(plan, n):
+    M = np.zeros((n, n))
+    for (d, c), amt in plan.amounts.items():
+        M[d, c] = amt
+    return M
+
+
+def balance_delta(old_net, new_net):
+    """Changed entries of a net-balance vector (net = to get - to give), as {idx: change}."""
+    diff = np.asarray(new_net, dtype=float) - np.asarray(old_net, dtype=float)
+    return {int(i): float(diff[i]) for i in np.flatnonzero(np.abs(diff) > EPS)}
+
+
+def _move(plan, payer, receiver, x, changes):
+    """Shift x from payer to receiver, shrinking a reverse transfer before creating a new one."""
+    reverse = plan.outgoing.get(receiver, {}).get(payer, 0.0)
+    if reverse > EPS:
+        cut = min(reverse, x)
+        set_transfer(plan, receiver, payer, reverse - cut, changes)
+        x -= cut
+    if x > EPS:
+        current = plan.outgoing.get(payer, {}).get(receiver, 0.0)
+        set_transfer(plan, payer, receiver, current + x, changes)
+
+
+def _collapse(plan, nodes, changes):
+    """
+    Reroute a -> k -> b through-payments as a -> b until no node in `nodes`
+    both pays and receives. Rerouting keeps every net balance; a node it
+    turns into a pass-through is queued in turn.
+    """
+    queue = list(nodes)
+    while queue:
+        k = queue.pop()
+        while plan.incoming.get(k) and plan.outgoing.get(k):
+            a, x = next(iter(plan.incoming[k].items()))
+            b, y = next(iter(plan.outgoing[k].items()))
+            cut = min(x, y)
+            set_transfer(plan, a, k, x - cut, changes)
+            set_transfer(plan, k, b, y - cut, changes)
+            if a != b:
+                _move(plan, a, b, cut, changes)
+                queue.extend((a, b))
+
+
+def resettle_incremental(plan, delta):
+    """
+    Adjust an existing transfer plan (in place) to a change in net balances.
+
+      - delta is {idx: change in net}, net = to get - to give (sums to zero).
+      - Step A: shrink existing transfers whose debtor now owes less and
+        whose creditor is now owed less.
+      - Step B: match what is left, largest payer with largest receiver,
+        reusing (or cancelling against) existing transfers where possible.
+      - Step C: reroute through-payments, so nobody both pays and receives
+        (a participant whose net is now zero ends with no transfers).
+
+    Only transfers touching changed participants are visited, so the cost
+    follows the size of the delta, not the group. Returns the change set
+    as a list of {"debtor", "creditor", "old", "new"}.
+    """
+    r = {int(i): float(v) for i, v in delta.items() if abs(v) > EPS}
+    changes = {}
+
+    # Step A
+    for d in [i for i, v in r.items() if v > EPS]:
+        for c, amt in list(plan.outgoing.get(d, {}).items()):
+            if r[d] <= EPS:
+                break
+            rc = r.get(c, 0.0)
+            if rc >= -EPS:
+                continue
+            x = min(amt, r[d], -rc)
+            set_transfer(plan, d, c, amt - x, changes)
+            r[d] -= x
+            r[c] = rc + x
+
+    # Step B
+    payers = sorted(((-v, i) for i, v in r.items() if v < -EPS), reverse=True)
+    receivers = sorted(((v, i) for i, v in r.items() if v > EPS), reverse=True)
+    p = q = 0
+    p_amt = payers[0][0] if payers else 0.0
+    q_amt = receivers[0][0] if receivers else 0.0
+    while p < len(payers) and q < len(receivers):
+        x = min(p_amt, q_amt)
+        _move(plan, payers[p][1], receivers[q][1], x, changes)
+        p_amt -= x
+        q_amt -= x
+        if p_amt <= EPS:
+            p += 1
+            p_amt = payers[p][0] if p < len(payers) else 0.0
+        if q_amt <= EPS:
+            q += 1
+            q_amt = receivers[q][0] if q < len(receivers) else 0.0
+
+    # Step C
+    _collapse(plan, r, changes)
+
+    return [
+        {"debtor": d, "creditor": c, "old": old, "new": new}
+        for (d, c), (old, new) in changes.items()
+        if abs(new - old) > EPS
+    ]
+
+
+def resettle_matrix(settled, old_matrix, new_matrix):
+    """Convenience wrapper: re-settle a previous settlement matrix after the owe matrix changed."""
+    old_matrix = np.asarray(old_matrix, dtype=float)
+    new_matrix = np.asarray(new_matrix, dtype=float)
+    old_net = old_matrix.sum(axis=0) - old_matrix.sum(axis=1)
+    new_net = new_matrix.sum(axis=0) - new_matrix.sum(axis=1)
+    plan = plan_from_matrix(settled)
+    changes = resettle_incremental(plan, balance_delta(old_net, new_net))
+    return plan_to_matrix(plan, len(new_net)), changes
@@ -1,7 +1,10 @@
+import os
+import tempfile
+
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
 PRINT_GRAPH = False
+GRAPH_DIR = os.path.join(tempfile.gettempdir(), "matrix_ui_graphs")
 PRINT_LOGS = False
 
 # FOR GRAPH 
@@ -17,32 +20,15 @@ def build_graph(matrix, labels):
     return G
 
 def print_graph(matrix, labels, title):
-    G = build_graph(matrix, labels)
-    pos = nx.circular_layout(G)  # fixed-radius, evenly spaced around a circle
-
+    """Debug helper: write the graph as a PNG under GRAPH_DIR (headless, never opens a window)."""
+    from logic.split_render import render_graph   # split_render imports this module
 
-    plt.figure(figsize=(6, 6))
-    nx.draw_networkx_nodes(G, pos, node_size=2500)  # node circles
-    nx.draw_networkx_labels(G, pos)
-    
-    nx.draw_networkx_edges(
-        G, pos,
-        arrowstyle='->', arrowsize=25,
-        connectionstyle='arc3, rad=0.2',
-        width=2.5,
-        min_target_margin=25         # Adds margin so arrows stop outside the node
-    )
-    edge_labels = {(u, v): f"{data['weight']:.0f}"
-                   for u, v, data in G.edges(data=True)}
-    nx.draw_networkx_edge_labels(
-        G, pos, edge_labels=edge_labels,
-        font_size=10, rotate=False,
-        bbox=dict(facecolor='white', edgecolor='none', pad=0.1)
-    )
-
-    plt.title(title)
-    plt.axis('off')
-    plt.show()
+    os.makedirs(GRAPH_DIR, exist_ok=True)
+    path = os.path.join(GRAPH_DIR, f"{title.replace(' ', '_')}-{len(os.listdir(GRAPH_DIR)) + 1}.png")
+    with open(path, "wb") as f:
+        f.write(render_graph(matrix, labels, title))
+    print(f"Graph written to {path}")
+    return path
 
 
 # FOR PRINTS 
@@ -281,6 +267,16 @@ def settle_on_tree(matrix, labels):
     return flow_mat
 
 
+STAGES = ("original", "self_loops", "bidirectional", "settled")
+
+def matrix_stages(mat, labels):
+    """Return every process_matrix stage keyed by name, without logging or drawing."""
+    mat1 = remove_self_loops(mat)
+    mat2 = reduce_bidirectional(mat1, labels)
+    mat3 = settle_greedy(mat2, labels)
+    return dict(zip(STAGES, (mat, mat1, mat2, mat3)))
+
+
 def process_matrix(mat, labels):
     
     
@@ -0,0 +1,175 @@
+import time
+
+import numpy as np
+
+from logic.split_logics import remove_self_loops, reduce_bidirectional, settle_greedy, reduce_to_tree
+from logic.split_constrained import CENTS, net_in_cents, settle_constrained
+from logic.split_capped import settle_capped
+from logic.split_bucketed import exact_pairs, settle_bucketed_matrix
+
+EXACT_LIMIT = 16   # non-zero balances up to which the optimum is computed exactly (2^n subset DP)
+EPS = 0.5 / CENTS
+
+
+def _pair_count(cents):
+    d_amt, c_amt = -cents[cents < 0], cents[cents > 0]
+    dp, cp = exact_pairs(d_amt, c_amt)
+    return int(dp.size), int(d_amt.size - dp.size), int(c_amt.size - cp.size)
+
+
+def max_zero_sum_groups(cents):
+    """Exact maximum number of disjoint zero-sum groups (subset DP, small inputs only)."""
+    vals = [int(v) for v in cents if v]
+    n = len(vals)
+    sums = [0] * (1 << n)
+    best = [0] * (1 << n)
+    for mask in range(1, 1 << n):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + vals[low.bit_length() - 1]
+        m, bit = mask, 0
+        top = 0
+        while m:
+            if m & 1:
+                top = max(top, best[mask ^ (1 << bit)])
+            m >>= 1
+            bit += 1
+        best[mask] = top + (sums[mask] == 0)
+    return best[-1]
+
+
+def heuristic_zero_sum_groups(cents):
+    """
+    Disjoint zero-sum groups found cheaply: exact pairs, then zero-sum runs
+    found by hashing prefix sums over the rest (largest debts interleaved
+    with largest credits). Every group found saves one transfer, so
+    nonzero - groups is a plan size known to be reachable.
+    """
+    d_amt, c_amt = -cents[cents < 0], cents[cents > 0]
+    dp, cp = exact_pairs(d_amt, c_amt)
+    d_rest = np.delete(d_amt, dp)
+    c_rest = np.delete(c_amt, cp)
+    d_rest, c_rest = -np.sort(d_rest)[::-1], np.sort(c_rest)[::-1]
+    seq = np.empty(d_rest.size + c_rest.size, dtype=np.int64)
+    k = min(d_rest.size, c_rest.size)
+    seq[0:2 * k:2], seq[1:2 * k:2] = d_rest[:k], c_rest[:k]
+    seq[2 * k:] = np.concatenate((d_rest[k:], c_rest[k:]))
+
+    groups, seen, running, open_run, leftover = 0, {0}, 0, False, False
+    for v in seq.tolist():
+        running += v
+        open_run = True
+        if running in seen:
+            # The run since this prefix sum was last seen sums to zero: close it and start over;
+            # anything before it joins the leftovers, which together also sum to zero
+            groups += 1
+            leftover = leftover or running != 0
+            seen, running, open_run = {0}, 0, False
+        else:
+            seen.add(running)
+    return int(dp.size) + groups + int(leftover or open_run)
+
+
+def transfer_bounds(matrix):
+    """
+    Bounds on the number of transfers any settlement of matrix needs.
+
+    With N non-zero balances and k disjoint zero-sum groups, the optimum is
+    N - max k. Groups of two are equal debtor/creditor pairs (at most p of
+    them), every other group has 3+ members and each group has a debtor and
+    a creditor, so max k <= p + min(D', C', (N - 2p) // 3), with D', C' the
+    unpaired debtors/creditors. That gives a valid lower bound; hashing
+    heuristics give a reachable upper bound. For N <= EXACT_LIMIT both are
+    the exact optimum.
+    """
+    cents = net_in_cents(matrix)
+    nonzero = int(np.count_nonzero(cents))
+    if nonzero <= EXACT_LIMIT:
+        best = nonzero - max_zero_sum_groups(cents)
+        return {"nonzero": nonzero, "lower_bound": best, "upper_bound": best, "exact": True}
+    pairs, d_left, c_left = _pair_count(cents)
+    k_max = pairs + min(d_left, c_left, (nonzero - 2 * pairs) // 3)
+    return {
+        "nonzero": nonzero,
+        "lower_bound": nonzero - k_max,
+        "upper_bound": nonzero - heuristic_zero_sum_groups(cents),
+        "exact": False,
+    }
+
+
+DEFAULT_STRATEGIES = {
+    "greedy": settle_greedy,
+    "hub": reduce_to_tree,
+    "capped": settle_capped,
+    "bucketed": settle_bucketed_matrix,
+    "constrained": settle_constrained,
+}
+
+
+def score(settled, matrix):
+    """Quality of one settlement matrix against the owe matrix it settles."""
+    S = np.asarray(settled, dtype=float)
+    used = np.abs(S) > EPS
+    np.fill_diagonal(used, False)
+    degree = used.sum(axis=0) + used.sum(axis=1)
+    residual = net_in_cents(matrix) - net_in_cents(S)
+    return {
+        "transfers": int(used.sum()),
+        "volume": float(np.abs(S[used]).sum()),
+        "max_per_person": int(degree.max()) if degree.size else 0,
+        "settles": bool(np.all(np.abs(residual) <= 1)),
+    }
+
+
+def scoreboard(matrix, labels, strategies=None):
+    """
+    Run every strategy on the same ledger (after self-loop and bidirectional
+    reduction, as in process_matrix) and report per strategy: transfers,
+    volume moved, max transfers per person, runtime and the gap to the
+    transfer lower bound. A strategy that raises (infeasible caps, a bug on
+    an edge case) gets an "error" row; the others are still scored.
+    """
+    labels = list(labels)
+    M = reduce_bidirectional(remove_self_loops(np.asarray(matrix, dtype=float)), labels)
+    bounds = transfer_bounds(M)
+    rows = {}
+    for name, strategy in (strategies or DEFAULT_STRATEGIES).items():
+        start = time.perf_counter()
+        try:
+            settled = strategy(M, labels)
+        except Exception as e:
+            rows[name] = {"error": f"{type(e).__name__}: {e}", "runtime": time.perf_counter() - start}
+            continue
+        runtime = time.perf_counter() - start
+        row = score(settled, M)
+        row["runtime"] = runtime
+        row["gap"] = row["transfers"] - bounds["lower_bound"]
+        rows[name] = row
+    return {"bounds": bounds, "strategies": rows}
+
+
+def print_scoreboard(board):
+    b = board["bounds"]
+    kind = "exact" if b["exact"] else f"{b['lower_bound']}..{b['upper_bound']}"
+    print(f"\n=== Scoreboard (non-zero {b['nonzero']}, optimum {kind}) ===")
+    print(f"{'Strategy':<14}{'Transfers':>10}{'Gap':>6}{'Volume':>12}{'Max/person':>12}{'Time ms':>10}")
+    for name, row in board["strategies"].items():
+        if "error" in row:
+            print(f"{name:<14}  error: {row['error']}")
+            continue
+        flag = "" if row["settles"] else "  (does not settle)"
+        print(f"{name:<14}{row['transfers']:>10}{row['gap']:>6}{row['volume']:>12.2f}"
+              f"{row['max_per_person']:>12}{row['runtime'] * 1000:>10.1f}{flag}")
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from Dataclass.splitDataclass import get_matrix
+
+    # Usage: python -m logic.split_quality json/all8.json
+    with open(sys.argv[1], 'r') as file:
+        data = json.load(file)
+    matrix, label = get_matrix(data)
+    labels = [name for name, _ in sorted(label.items(), key=lambda x: x[1])]
+    print_scoreboard(scoreboard(np.array(matrix, dtype=float), labels))
@@ -0,0 +1,230 @@
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import networkx as nx
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from logic.split_logics import STAGES, build_graph, matrix_stages
+from matrix_store import matrix_key
+
+# Headless rendering: figures are drawn on an Agg canvas, never through pyplot/plt.show()
+LAYOUT_CACHE_SIZE = 32
+IMAGE_CACHE_SIZE = 256
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+LARGE_GRAPH_LIMIT = 50   # above this many participants, render_stage switches to the top-k view
+TOP_K = 20
+MAX_TOP_K = 200   # requests may ask for more labelled transfers, up to this many
+MAX_COMMUNITIES = 8
+
+_layout_cache = OrderedDict()   # tuple(sorted(labels)) -> {label: (x, y)}
+_image_cache = OrderedDict()    # (matrix_key, title, fmt) -> bytes
+_cache_lock = threading.Lock()  # both caches are shared by request threads and the asgi.py pool
+
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def _lru_put(cache, key, value, max_size):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def get_layout(labels, G=None):
+    """
+    Node positions for a participant set, computed once and reused.
+    The node set never changes across process_matrix stages, so the
+    cache is keyed by the sorted label set only; G (if given) seeds the
+    spring layout the first time the set is seen.
+    """
+    key = tuple(sorted(labels))
+    pos = _lru_get(_layout_cache, key)
+    if pos is None:
+        H = nx.DiGraph(G) if G is not None else nx.DiGraph()
+        H.add_nodes_from(key)  # every label gets a position, even if G has no edge on it yet
+        pos = nx.spring_layout(H, seed=42)
+        _lru_put(_layout_cache, key, pos, LAYOUT_CACHE_SIZE)
+    return pos
+
+
+def draw_graph(ax, G, pos):
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=700)
+    nx.draw_networkx_labels(G, pos, ax=ax)
+    nx.draw_networkx_edges(
+        G, pos, ax=ax,
+        arrowstyle='->', arrowsize=20,
+        connectionstyle='arc3, rad=0.2'
+    )
+    edge_labels = {(u, v): f"{data['weight']:.0f}"
+                   for u, v, data in G.edges(data=True)}
+    nx.draw_networkx_edge_labels(
+        G, pos, ax=ax, edge_labels=edge_labels,
+        font_size=10, rotate=False,
+        bbox=dict(facecolor='white', edgecolor='none', pad=0.3)
+    )
+
+
+def figure_bytes(fig, fmt):
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.savefig(buf, format=fmt, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def render_graph(matrix, labels, title="Graph", fmt="png"):
+    """Render a settlement matrix as PNG/SVG bytes; cached by matrix hash."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported image format '{fmt}'.")
+    labels = list(labels)
+    key = (matrix_key(labels, matrix), title, fmt)
+    image = _lru_get(_image_cache, key)
+    if image is not None:
+        return image
+
+    G = build_graph(np.asarray(matrix, dtype=float), labels)
+    pos = get_layout(labels, G)
+
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot()
+    draw_graph(ax, G, pos)
+    ax.set_title(title)
+    ax.axis('off')
+    image = figure_bytes(fig, fmt)
+
+    _lru_put(_image_cache, key, image, IMAGE_CACHE_SIZE)
+    return image
+
+
+# LARGE GROUPS : top-k transfers + per-community aggregates
+def sparse_edges(matrix):
+    """(rows, cols, weights) of the non-zero, off-diagonal cells."""
+    M = np.asarray(matrix, dtype=float)
+    rows, cols = np.nonzero(M)
+    keep = rows != cols
+    rows, cols = rows[keep], cols[keep]
+    return rows, cols, M[rows, cols]
+
+
+def find_communities(n, rows, cols, max_communities=MAX_COMMUNITIES):
+    """
+    Community id per participant via label propagation on the undirected edge set.
+    The largest max_communities - 1 communities keep their own id, the rest share one.
+    """
+    U = nx.Graph()
+    U.add_nodes_from(range(n))
+    U.add_edges_from(zip(rows.tolist(), cols.tolist()))
+    groups = sorted(nx.community.label_propagation_communities(U), key=len, reverse=True)
+
+    comm = np.empty(n, dtype=np.int64)
+    other = max_communities - 1
+    for cid, members in enumerate(groups):
+        comm[list(members)] = min(cid, other)
+    return comm
+
+
+def build_sparse_graph(rows, cols, weights, labels, top_k=TOP_K, max_communities=MAX_COMMUNITIES):
+    """
+    Graph of the top_k heaviest transfers between people, plus one node per
+    community carrying the sum of all remaining transfers between communities.
+    Node count is bounded by 2 * top_k + max_communities whatever the group size.
+    """
+    n = len(labels)
+    rows, cols, weights = np.asarray(rows), np.asarray(cols), np.asarray(weights, dtype=float)
+    top_k = max(0, int(top_k))
+    if top_k == 0:
+        top = np.arange(0)
+    elif weights.size > top_k:
+        top = np.argpartition(weights, -top_k)[-top_k:]
+    else:
+        top = np.arange(weights.size)
+    rest = np.ones(weights.size, dtype=bool)
+    rest[top] = False
+
+    G = nx.DiGraph()
+    for i, j, w in zip(rows[top].tolist(), cols[top].tolist(), weights[top].tolist()):
+        G.add_edge(labels[i], labels[j], weight=w, kind="top")
+
+    if rest.any():
+        comm = find_communities(n, rows, cols, max_communities)
+        sizes = np.bincount(comm, minlength=max_communities)
+        C = np.zeros((max_communities, max_communities))
+        np.add.at(C, (comm[rows[rest]], comm[cols[rest]]), weights[rest])
+        np.fill_diagonal(C, 0)   # transfers inside one community are not drawn
+        name = lambda c: f"Group {c + 1} ({sizes[c]})"
+        for c in np.unique(comm):
+            G.add_node(name(c), kind="group")
+        for a, b in zip(*np.nonzero(C)):
+            G.add_edge(name(a), name(b), weight=float(C[a, b]), kind="aggregate")
+    return G
+
+
+def render_large_graph(matrix, labels, title="Graph", fmt="png", top_k=TOP_K, max_communities=MAX_COMMUNITIES):
+    """Render the bounded top-k / community view; cached by matrix hash and parameters."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported image format '{fmt}'.")
+    labels = list(labels)
+    key = (matrix_key(labels, matrix), f"{title}|top{top_k}|c{max_communities}", fmt)
+    image = _lru_get(_image_cache, key)
+    if image is not None:
+        return image
+
+    G = build_sparse_graph(*sparse_edges(matrix), labels, top_k, max_communities)
+    pos = nx.spring_layout(G, seed=42)
+
+    fig = Figure(figsize=(8, 8))
+    ax = fig.add_subplot()
+    groups = [u for u, d in G.nodes(data=True) if d.get("kind") == "group"]
+    people = [u for u, d in G.nodes(data=True) if d.get("kind") != "group"]
+    nx.draw_networkx_nodes(G, pos, ax=ax, nodelist=people, node_size=500)
+    nx.draw_networkx_nodes(G, pos, ax=ax, nodelist=groups, node_size=1500, node_color="lightgrey")
+    nx.draw_networkx_labels(G, pos, ax=ax, font_size=8)
+    for kind, style in (("top", "solid"), ("aggregate", "dashed")):
+        edges = [(u, v) for u, v, d in G.edges(data=True) if d["kind"] == kind]
+        nx.draw_networkx_edges(G, pos, ax=ax, edgelist=edges, style=style,
+                               arrowstyle='->', arrowsize=15, connectionstyle='arc3, rad=0.2')
+    # Only the top-k transfers are labelled
+    edge_labels = {(u, v): f"{d['weight']:.0f}" for u, v, d in G.edges(data=True) if d["kind"] == "top"}
+    nx.draw_networkx_edge_labels(G, pos, ax=ax, edge_labels=edge_labels, font_size=8, rotate=False,
+                                 bbox=dict(facecolor='white', edgecolor='none', pad=0.2))
+    ax.set_title(title)
+    ax.axis('off')
+    image = figure_bytes(fig, fmt)
+
+    _lru_put(_image_cache, key, image, IMAGE_CACHE_SIZE)
+    return image
+
+
+def render_stage(matrix, labels, stage, fmt="png", top_k=None):
+    """
+    Render one process_matrix stage ("original", "self_loops", "bidirectional", "settled").
+    Groups above LARGE_GRAPH_LIMIT (or any call with top_k) use the top-k view.
+    """
+    if stage not in STAGES:
+        raise KeyError(f"Unknown stage '{stage}'.")
+    labels = list(labels)
+    matrix = np.asarray(matrix, dtype=float)
+    large = top_k is not None or len(labels) > LARGE_GRAPH_LIMIT
+    stage_key = (matrix_key(labels, matrix), f"stage:{stage}|top{top_k if large else ''}", fmt)
+    image = _lru_get(_image_cache, stage_key)
+    if image is not None:
+        return image
+
+    stages = matrix_stages(matrix, labels)
+    if large:
+        image = render_large_graph(stages[stage], labels, title=stage, fmt=fmt, top_k=TOP_K if top_k is None else top_k)
+    else:
+        # Seed the shared layout from the original matrix so every stage uses the same positions
+        if tuple(sorted(labels)) not in _layout_cache:
+            get_layout(labels, build_graph(stages["original"], labels))
+        image = render_graph(stages[stage], labels, title=stage, fmt=fmt)
+    _lru_put(_image_cache, stage_key, image, IMAGE_CACHE_SIZE)
+    return image
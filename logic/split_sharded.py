@@ -0,0 +1,130 @@
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Dataclass.splitDataclass import parse_initial_input, new_compute_allocations, add_to_matrix
+from logic.split_logics import process_matrix
+
+
+# SHARD LOADING
+def load_shard(shard):
+    """Return the transaction list of a shard given as a JSON path, a split dict or a list."""
+    if isinstance(shard, (str, os.PathLike)):
+        with open(shard, 'r') as file:
+            shard = json.load(file)
+    if isinstance(shard, dict):
+        return shard.get("transactions", [])
+    return list(shard)
+
+
+# MAP : one shard -> partial (net, pairs)
+def map_shard(shard, names):
+    """
+    Compute the partial net-balance vector and pairwise debts of one shard.
+    The debts are sparse (rows, cols, amounts) arrays, so a partial costs
+    O(pairs that owe) to pickle, not O(n^2).
+    """
+    n = len(names)
+    tx_list = load_shard(shard)
+    if not tx_list:
+        return np.zeros(n), _pairs([], [], [])
+
+    ms = parse_initial_input({"name_count": n, "names": list(names), "transactions": tx_list})
+    new_compute_allocations(ms)
+    debts = defaultdict(lambda: defaultdict(float))   # add_to_matrix only needs debts[i][j] += x
+    add_to_matrix(debts, {name: i for i, name in enumerate(names)}, ms.transactions)
+    entries = [(i, j, amt) for i, row in debts.items() for j, amt in row.items()]
+    net = np.array([ms.names_map[name].net_balance for name in names], dtype=float)
+    return net, _pairs(*zip(*entries)) if entries else _pairs([], [], [])
+
+
+def _pairs(rows, cols, amounts):
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(amounts, dtype=float)
+
+
+def pairs_to_matrix(pairs, n):
+    """Dense matrix[i, j] = what names[i] owes names[j] from sparse (rows, cols, amounts)."""
+    rows, cols, amounts = pairs
+    matrix = np.zeros((n, n))
+    np.add.at(matrix, (rows, cols), amounts)
+    return matrix
+
+
+def _map_chunk(chunk, names):
+    # Reduce locally inside the worker so only one partial per chunk is pickled back
+    return tree_reduce([map_shard(shard, names) for shard in chunk])
+
+
+# REDUCE
+def merge_partials(a, b):
+    """Add two (net, pairs) partials; amounts of a pair present in both are summed."""
+    rows, cols, amounts = (np.concatenate([x, y]) for x, y in zip(a[1], b[1]))
+    if rows.size:
+        pairs, inverse = np.unique(np.stack([rows, cols]), axis=1, return_inverse=True)
+        rows, cols, amounts = pairs[0], pairs[1], np.bincount(inverse.ravel(), weights=amounts)
+    return a[0] + b[0], (rows, cols, amounts)
+
+def tree_reduce(partials):
+    """Pairwise (log-depth) reduction of (net, pairs) partials."""
+    parts = list(partials)
+    if not parts:
+        raise ValueError("tree_reduce needs at least one partial result.")
+    while len(parts) > 1:
+        merged = [merge_partials(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
+
+
+def sharded_net_balances(shards, names, workers=None):
+    """
+    Map-reduce the allocation over many transaction shards:
+      - Split the shards into one chunk per worker process.
+      - Each worker allocates its shards and reduces them to one (net, pairs) partial.
+      - The partials are merged with a tree reduction.
+    Returns (net, matrix), where matrix[i, j] is what names[i] owes names[j];
+    the dense matrix is only built once, from the merged pairs.
+    """
+    shards = list(shards)
+    n = len(names)
+    if not shards:
+        return np.zeros(n), np.zeros((n, n))
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(shards))
+    if workers == 1:
+        net, pairs = _map_chunk(shards, names)
+    else:
+        chunks = [shards[k::workers] for k in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_map_chunk, chunks, [names] * workers))
+        net, pairs = tree_reduce(partials)
+    return net, pairs_to_matrix(pairs, n)
+
+
+def sharded_settlement(shards, names, workers=None):
+    """Run the sharded allocation and feed the merged matrix straight into settlement."""
+    _, matrix = sharded_net_balances(shards, names, workers)
+    return process_matrix(matrix, list(names))
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python -m logic.split_sharded ledger1.json ledger2.json ...
+    paths = sys.argv[1:]
+    names = []
+    for path in paths:
+        with open(path, 'r') as file:
+            for name in json.load(file).get("names", []):
+                if name not in names:
+                    names.append(name)
+
+    net, _ = sharded_net_balances(paths, names)
+    for name, bal in zip(names, net):
+        print(f"{name:<12}{bal:10.2f}")
+    sharded_settlement(paths, names)
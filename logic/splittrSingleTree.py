@@ -2,6 +2,13 @@ import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
 
+try:
+    from logic.split_render import get_layout
+except ImportError:
+    # Run directly as a script (python logic/splittrSingleTree.py): no package path, no shared cache
+    def get_layout(labels, G):
+        return nx.spring_layout(G, seed=42)
+
 def build_graph(matrix, labels):
     G = nx.DiGraph()
     size = len(matrix)
@@ -13,7 +20,7 @@ def build_graph(matrix, labels):
 
 def print_graph(matrix, labels, title="Graph"):
     G = build_graph(matrix, labels)
-    pos = nx.spring_layout(G, seed=42)
+    pos = get_layout(labels, G)
     plt.figure(figsize=(8, 6))
     edge_labels = {(labels[i], labels[j]): matrix[i][j] for i in range(len(matrix)) for j in range(len(matrix)) if matrix[i][j] != 0}
     nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=2000, font_weight='bold', arrowsize=20, connectionstyle='arc3, rad=0.2')
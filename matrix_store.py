@@ -0,0 +1,126 @@
+# matrix_store.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from settlement_cache import get_cache
+from logic.split_logics import matrix_stages
+
+MAX_ENTRIES = 64
+SHARED_CACHE = True   # mirror entries into the cross-process settlement cache
+# Part of every shared "settled:" key: bump it when matrix_stages changes its output,
+# so settlements cached on disk by an older build are not served
+SETTLEMENT_VERSION = 1
+
+# key -> {"colnames", "matrix", "nonzero"}; nonzero coordinates are computed on first use
+_store = OrderedDict()
+_store_lock = threading.Lock()   # request threads and the asgi.py pool share _store
+
+
+def matrix_key(colnames, matrix):
+    """Content hash of a matrix and its labels; identical submissions share one entry."""
+    h = hashlib.sha1(json.dumps(list(colnames)).encode("utf-8"))
+    h.update(np.ascontiguousarray(matrix, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+def put_matrix(colnames, matrix):
+    mat = np.asarray(matrix, dtype=float)
+    key = matrix_key(colnames, mat)
+    with _store_lock:
+        known = key in _store
+    if not known:
+        _remember(key, list(colnames), mat)
+        if SHARED_CACHE:
+            get_cache().put(f"matrix:{key}", {"colnames": np.array(colnames, dtype=str), "matrix": mat})
+    return key
+
+
+def _remember(key, colnames, mat):
+    entry = {"colnames": colnames, "matrix": mat, "nonzero": None, "settled": None}
+    with _store_lock:
+        _store[key] = entry
+        _store.move_to_end(key)
+        while len(_store) > MAX_ENTRIES:
+            _store.popitem(last=False)
+    return entry
+
+
+def get_matrix(key):
+    """
+    Return the stored entry or None if the key is unknown or evicted.
+    Local misses fall back to the shared cache, so any worker can serve a
+    matrix computed by another one.
+    """
+    with _store_lock:
+        entry = _store.get(key)
+        if entry is not None:
+            _store.move_to_end(key)
+            return entry
+    if SHARED_CACHE:
+        shared = get_cache().get(f"matrix:{key}")
+        if shared is not None:
+            return _remember(key, shared["colnames"].tolist(), shared["matrix"])
+    return None
+
+
+def get_settlement(key):
+    """Settled transfer matrix (process_matrix's final stage) for a stored matrix, shared across workers."""
+    entry = get_matrix(key)
+    if entry is None:
+        return None
+    if entry.get("settled") is None:
+        cache_key = f"settled:v{SETTLEMENT_VERSION}:{key}"
+        shared = get_cache().get(cache_key) if SHARED_CACHE else None
+        if shared is not None:
+            entry["settled"] = shared["settled"]
+        else:
+            entry["settled"] = matrix_stages(entry["matrix"], entry["colnames"])["settled"]
+            if SHARED_CACHE:
+                get_cache().put(cache_key, {"settled": entry["settled"]})
+    colnames, settled = entry["colnames"], entry["settled"]
+    return [
+        {"from": colnames[i], "to": colnames[j], "amount": round(float(settled[i, j]), 2)}
+        for i, j in zip(*np.nonzero(settled))
+    ]
+
+
+def get_tile(key, row, col, rows, cols):
+    entry = get_matrix(key)
+    if entry is None:
+        return None
+    colnames, mat = entry["colnames"], entry["matrix"]
+    n = len(colnames)
+    row, col = max(0, min(row, n)), max(0, min(col, n))
+    rows, cols = max(0, rows), max(0, cols)
+    window = mat[row:row + rows, col:col + cols]
+    return {
+        "row": row,
+        "col": col,
+        "row_names": colnames[row:row + window.shape[0]],
+        "col_names": colnames[col:col + window.shape[1]],
+        "cells": np.round(window, 2).tolist(),
+    }
+
+
+def get_sparse(key, offset=0, limit=1000):
+    """Non-zero cells only, as [i, j, value] triples in row-major order."""
+    entry = get_matrix(key)
+    if entry is None:
+        return None
+    if entry["nonzero"] is None:
+        entry["nonzero"] = np.nonzero(entry["matrix"])
+    mat = entry["matrix"]
+    rows_idx, cols_idx = entry["nonzero"]
+    offset, limit = max(0, offset), max(0, limit)
+    page = slice(offset, offset + limit)
+    vals = mat[rows_idx[page], cols_idx[page]]
+    return {
+        "total": int(rows_idx.size),
+        "offset": offset,
+        "cells": [[int(i), int(j), round(float(v), 2)]
+                  for i, j, v in zip(rows_idx[page], cols_idx[page], vals)],
+    }
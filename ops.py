@@ -1,3 +1,50 @@
+# What the submission parsers raise on a malformed payload; routes.py and asgi.py both answer 400
+PAYLOAD_ERRORS = (KeyError, TypeError, ValueError)
+
+
+def payload_error(e):
+    """The 400 message for one of PAYLOAD_ERRORS, the same under Flask and ASGI."""
+    if isinstance(e, KeyError):
+        return f"Invalid matrix payload: missing {e.args[0]!r}." if e.args else "Invalid matrix payload."
+    return f"Invalid matrix payload: {e}"
+
+
+def parse_submission(data, is_json):
+    """(size, colnames, rows) from a decoded JSON payload or from form fields."""
+    return parse_json_payload(data) if is_json else parse_form(data)
+
+
+def _build_row(title, amount, paid_by, toggle, checked_names, detail_map):
+    total_specified = sum(detail_map.values())
+    unspecified_count = len(checked_names) - len(detail_map)
+
+    avg = (
+        (amount - total_specified) / unspecified_count
+        if toggle and unspecified_count > 0
+        else (amount / len(checked_names) if checked_names else 0)
+    )
+
+    checked_map = {}
+    if toggle:
+        for name in checked_names:
+            checked_map[name] = detail_map[name] if name in detail_map else avg
+    else:
+        for name in checked_names:
+            checked_map[name] = avg
+
+    return {
+        "title":         title,
+        "amount":        amount,
+        "paid_by":       paid_by,
+        "toggle":        toggle,
+        "even_split":    not toggle,   # toggle on means an uneven split
+        "checked_names": checked_names,
+        "detail_map":    detail_map,
+        "avg":           avg,
+        "checked_map":   checked_map
+    }
+
+
 def parse_form(form):
     size = int(form["size"])
     row_count = int(form["row_count"])
@@ -25,36 +72,72 @@ def parse_form(form):
                     pass
         print("Detail Map:", detail_map)
 
-        total_specified = sum(detail_map.values())
-        unspecified_count = len(checked_names) - len(detail_map)
-
-        avg = (
-            (amount - total_specified) / unspecified_count
-            if toggle and unspecified_count > 0
-            else (amount / len(checked_names) if checked_names else 0)
-        )
-
-        checked_map = {}
-        if toggle:
-            for name in checked_names:
-                checked_map[name] = detail_map[name] if name in detail_map else avg
-        else:
-            for name in checked_names:
-                checked_map[name] = avg
-
-        rows.append({
-            "title":         title,
-            "amount":        amount,
-            "paid_by":       paid_by,
-            "toggle":        toggle,
-            "checked_names": checked_names,
-            "avg":           avg,
-            "checked_map":   checked_map
-        })
+        rows.append(_build_row(title, amount, paid_by, toggle, checked_names, detail_map))
 
     return size, colnames, rows
 
 
+def parse_json_payload(payload):
+    """
+    Parse the compact JSON submission in one pass over its non-zero entries:
+        {"names": [...],
+         "rows": [{"title": str, "amount": float, "paid_by": idx, "toggle": bool,
+                   "checked": [idx, ...], "detail": [[idx, amount], ...]}]}
+    Returns the same (size, colnames, rows) as parse_form.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("names"), list):
+        raise ValueError('Payload must be an object with a "names" list.')
+    if not isinstance(payload.get("rows", []), list):
+        raise ValueError('"rows" must be a list.')
+    colnames = [str(name) for name in payload["names"]]
+    size = len(colnames)
+
+    def name_at(j):
+        j = int(j)
+        if not 0 <= j < size:
+            raise ValueError(f"Participant index {j} out of range.")
+        return colnames[j]
+
+    rows = []
+    for r, raw in enumerate(payload.get("rows", [])):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Row {r}: expected an object, got {type(raw).__name__}.")
+        try:
+            payer = raw.get("paid_by")
+            rows.append(_build_row(
+                raw.get("title", ""),
+                float(raw.get("amount") or 0),
+                name_at(payer) if payer is not None else "",
+                bool(raw.get("toggle", False)),
+                [name_at(j) for j in raw.get("checked", [])],
+                {name_at(j): float(v) for j, v in raw.get("detail", [])},
+            ))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Row {r}: {e}") from e
+
+    return size, colnames, rows
+
+
+def build_matrix(rows, colnames):
+    """Owe matrix from parsed rows: matrix[i][j] is what colnames[i] owes colnames[j]."""
+    n = len(colnames)
+    name_to_idx = {name: i for i, name in enumerate(colnames)}
+    matrix = [[0.0] * n for _ in range(n)]
+    for entry in rows:
+        payer = entry["paid_by"]
+        if payer not in name_to_idx:
+            continue
+        pc = name_to_idx[payer]
+        for owe_name, amt in entry["checked_map"].items():
+            if owe_name not in name_to_idx:
+                continue
+            orow = name_to_idx[owe_name]
+            if orow == pc:
+                continue
+            matrix[orow][pc] += amt
+    return matrix, name_to_idx
+
+
 def print_split_matrix(rows, colnames):
     n = len(colnames)
     name_to_idx = {name: i for i, name in enumerate(colnames)}
@@ -0,0 +1,125 @@
+# profiling.py
+# On-demand profiling of single requests. Off unless MATRIX_UI_PROFILE_TOKEN is
+# set: then a request carrying that token in the X-Profile-Token header (never
+# in the URL, where it would end up in logs) runs under cProfile, from parsing
+# through rendering.
+#   X-Profile-Mode: store  -> profile saved as a .prof file, name in the X-Profile-File header (default)
+#   X-Profile-Mode: inline -> the response body is replaced by the pstats report
+# One request is profiled at a time (cProfile cannot run twice at once); a second
+# one gets 409. Streamed responses (SSE, reports) are passed through unprofiled,
+# marked with X-Profile-Skipped, since profiling them would mean buffering them.
+# Under asgi.py the natively served POST /matrix is not covered, every Flask route is.
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+
+PROFILE_TOKEN_ENV = "MATRIX_UI_PROFILE_TOKEN"
+PROFILE_DIR = os.environ.get("MATRIX_UI_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "matrix_ui_profiles"))
+REPORT_LINES = 60
+
+
+class ProfilingMiddleware:
+    """WSGI middleware: profile the requests that present the admin token, pass the rest straight through."""
+
+    def __init__(self, app, token, directory=PROFILE_DIR):
+        self.app = app
+        self.token = token
+        self.directory = directory
+        self._busy = threading.Lock()
+
+    def _requested(self, environ):
+        given = environ.get("HTTP_X_PROFILE_TOKEN")
+        return given is not None and hmac.compare_digest(given.encode(), self.token.encode())
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ):
+            return self.app(environ, start_response)
+        if "text/event-stream" in environ.get("HTTP_ACCEPT", ""):
+            return self.app(environ, _mark_skipped(start_response))
+        if not self._busy.acquire(blocking=False):
+            body = b"Another request is being profiled, retry later.\n"
+            start_response("409 Conflict", [("Content-Type", "text/plain; charset=utf-8"),
+                                            ("Content-Length", str(len(body)))])
+            return [body]
+        try:
+            return self._profile(environ, start_response)
+        finally:
+            self._busy.release()
+
+    def _profile(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured["status"], captured["headers"] = status, list(headers)
+            return lambda data: captured.setdefault("written", []).append(data)
+
+        # The body is consumed inside the profile so lazy rendering is covered too
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = self.app(environ, capture)
+            if _streamed(captured.get("headers", [])):
+                # Never buffer a stream (an SSE one would never end): hand it over as it is
+                profiler.disable()
+                write = _mark_skipped(start_response)(captured["status"], captured["headers"])
+                for data in captured.get("written", []):
+                    write(data)
+                return result
+            try:
+                body = captured.get("written", []) + list(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            profiler.disable()
+
+        if environ.get("HTTP_X_PROFILE_MODE") == "inline":
+            report = profile_report(profiler).encode("utf-8")
+            start_response("200 OK", [("Content-Type", "text/plain; charset=utf-8"),
+                                      ("Content-Length", str(len(report)))])
+            return [report]
+
+        path = store_profile(profiler, environ, self.directory)
+        start_response(captured["status"], captured["headers"] + [("X-Profile-File", os.path.basename(path))])
+        return body
+
+
+def _streamed(headers):
+    # Flask sends Content-Length for buffered bodies; streams have none, SSE is always a stream
+    names = {name.lower(): value for name, value in headers}
+    return "content-length" not in names or names.get("content-type", "").startswith("text/event-stream")
+
+
+def _mark_skipped(start_response):
+    def start(status, headers, exc_info=None):
+        return start_response(status, list(headers) + [("X-Profile-Skipped", "streamed response")], exc_info)
+    return start
+
+
+def profile_report(profiler, lines=REPORT_LINES):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(lines)
+    return out.getvalue()
+
+
+def store_profile(profiler, environ, directory=PROFILE_DIR):
+    """Dump the profile as <time>-<method>-<path>.prof (readable with pstats or snakeviz); returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    route = environ.get("PATH_INFO", "/").strip("/").replace("/", "_") or "index"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{environ.get('REQUEST_METHOD', 'GET')}-{route}.prof"
+    path = os.path.join(directory, name)
+    profiler.dump_stats(path)
+    return path
+
+
+def install_profiler(app):
+    """Wrap app.wsgi_app only when a token is configured, so normal deployments pay nothing."""
+    token = os.environ.get(PROFILE_TOKEN_ENV)
+    if token:
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, token)
+    return app
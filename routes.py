@@ -1,43 +1,403 @@
 # routes.py
-from flask import Blueprint, render_template, request
-from ops import parse_form
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime, timezone
+from flask import Blueprint, render_template, request, jsonify, abort, make_response, Response, stream_with_context
+from ops import PAYLOAD_ERRORS, payload_error, parse_submission, build_matrix
+from matrix_store import put_matrix, get_matrix, get_tile, get_sparse, get_settlement
+from logic.split_render import FORMATS, MAX_TOP_K, render_stage
+from Dataclass.splitDataclass import (
+    parse_initial_input, new_compute_allocations, participant_statement, pair_statement,
+    category_cell, category_breakdown, category_totals, parse_timestamp, period_to_dict,
+)
+from Dataclass.splitReport import iter_report_lines, iter_csv_chunks
+from Dataclass.splitLedger import create_group, get_group
+from Dataclass.splitValidate import validate_ledger
 
 bp = Blueprint("main", __name__)
 
+FULL_RENDER_LIMIT = 50   # groups above this size get the tiled matrix view
+SSE_KEEPALIVE = 15       # seconds between keep-alive comments on idle event streams
+TILE_SIZE = 50
+MAX_TILE_SIZE = 200
+MAX_SPARSE_PAGE = 10000
+ALLOCATION_CACHE_SIZE = 8   # allocated split bodies kept for /statement and /report paging
+
+_allocations = OrderedDict()   # sha1 of the posted body -> allocated MoneySplit (only read afterwards)
+_allocations_lock = threading.Lock()
+
+def _conditional(etag, last_modified, build):
+    """
+    Answer 304 from the validators alone when the client copy is current;
+    otherwise call build() for the full response. If-None-Match wins over
+    If-Modified-Since, as in RFC 9110.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        ims = request.if_modified_since
+        fresh = ims is not None and last_modified is not None and last_modified <= ims
+    resp = Response(status=304) if fresh else make_response(build())
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    return resp
+
 @bp.route("/", methods=["GET"])
 def index():
     return render_template("index.html")
 
 @bp.route("/matrix", methods=["POST"])
 def matrix_view():
-    # Parse form data into rows and column names
-    size, colnames, rows = parse_form(request.form)
+    # Parse the compact JSON submission, or the per-cell form fields from older clients
+    try:
+        size, colnames, rows = parse_submission(request.get_json() if request.is_json else request.form,
+                                                request.is_json)
+    except PAYLOAD_ERRORS as e:
+        abort(400, description=payload_error(e))
+    # Reject bad rows before they reach the matrix
+    report = validate_ledger(rows, colnames)
+    if not report.ok:
+        return jsonify(asdict(report)), 400
     print("Parsed Rows:")   
     for r in rows:
         print(r)
     # Compute the settlement matrix
-    name_to_idx = {name: i for i, name in enumerate(colnames)}
-    n = len(colnames)
-    matrix = [[0.0] * n for _ in range(n)]
-    for entry in rows:
-        payer = entry["paid_by"]
-        if payer not in name_to_idx:
-            continue
-        pc = name_to_idx[payer]
-        for owe_name, amt in entry["checked_map"].items():
-            if owe_name not in name_to_idx:
-                continue
-            orow = name_to_idx[owe_name]
-            if orow == pc:
-                continue
-            matrix[orow][pc] += amt
+    matrix, name_to_idx = build_matrix(rows, colnames)
     print("Name to Index Mapping:")
     print(name_to_idx)
 
+    # Large groups get a tiled page that fetches windows of the stored matrix on demand
+    key = put_matrix(colnames, matrix)
+    if len(colnames) > FULL_RENDER_LIMIT:
+        return render_template(
+            "matrix.html",
+            colnames=colnames,
+            matrix_key=key,
+            tiled=True
+        )
+
     # Render the matrix template
     print(matrix)
     return render_template(
         "matrix.html",
         colnames=colnames,
-        matrix=matrix
-    )
\ No newline at end of file
+        matrix=matrix,
+        matrix_key=key,
+        tiled=False
+    )
+
+
+@bp.route("/matrix/<key>/tile", methods=["GET"])
+def matrix_tile_view(key):
+    # ?row=&col= top-left corner, ?rows=&cols= window size
+    def build():
+        tile = get_tile(
+            key,
+            request.args.get("row", 0, type=int),
+            request.args.get("col", 0, type=int),
+            min(request.args.get("rows", TILE_SIZE, type=int), MAX_TILE_SIZE),
+            min(request.args.get("cols", TILE_SIZE, type=int), MAX_TILE_SIZE),
+        )
+        if tile is None:
+            abort(404, description="Matrix expired, please resubmit.")
+        return jsonify(tile)
+
+    # Stored matrices are content-addressed: the key itself is a strong validator
+    return _conditional(key, None, build)
+
+
+@bp.route("/matrix/<key>/sparse", methods=["GET"])
+def matrix_sparse_view(key):
+    def build():
+        page = get_sparse(
+            key,
+            max(0, request.args.get("offset", 0, type=int)),
+            min(request.args.get("limit", 1000, type=int), MAX_SPARSE_PAGE),
+        )
+        if page is None:
+            abort(404, description="Matrix expired, please resubmit.")
+        return jsonify(page)
+
+    return _conditional(key, None, build)
+
+
+@bp.route("/matrix/<key>/settlement", methods=["GET"])
+def matrix_settlement_view(key):
+    def build():
+        transfers = get_settlement(key)
+        if transfers is None:
+            abort(404, description="Matrix expired, please resubmit.")
+        return jsonify({"transfers": transfers})
+
+    return _conditional(key, None, build)
+
+
+@bp.route("/matrix/<key>/graph/<stage>.<fmt>", methods=["GET"])
+def matrix_graph_view(key, stage, fmt):
+    entry = get_matrix(key)
+    if entry is None:
+        abort(404, description="Matrix expired, please resubmit.")
+    if fmt not in FORMATS:
+        abort(404, description=f"Unsupported image format '{fmt}'.")
+    top_k = request.args.get("top_k", None, type=int)
+    if top_k is not None:
+        top_k = min(max(top_k, 0), MAX_TOP_K)   # bounds the render cost per request
+    try:
+        image = render_stage(entry["matrix"], entry["colnames"], stage, fmt, top_k=top_k)
+    except KeyError as e:
+        abort(404, description=str(e.args[0]))
+    return Response(image, mimetype=FORMATS[fmt])
+
+
+@bp.route("/validate", methods=["POST"])
+def validate_view():
+    # Body is a split JSON (see README); reports every problem with its row index
+    body = request.get_json(force=True) or {}
+    report = validate_ledger(body.get("transactions", []), body.get("names", []))
+    return jsonify(asdict(report)), (200 if report.ok else 422)
+
+
+def _allocated_split():
+    # Paging a statement or report re-posts the same body: allocate it once
+    key = hashlib.sha1(request.get_data()).hexdigest()
+    with _allocations_lock:
+        ms = _allocations.get(key)
+        if ms is not None:
+            _allocations.move_to_end(key)
+            return ms
+    try:
+        ms = new_compute_allocations(parse_initial_input(request.get_json(force=True)))
+    except ValueError as e:
+        abort(400, description=str(e))
+    with _allocations_lock:
+        _allocations[key] = ms
+        while len(_allocations) > ALLOCATION_CACHE_SIZE:
+            _allocations.popitem(last=False)
+    return ms
+
+
+@bp.route("/statement", methods=["POST"])
+def statement_view():
+    # Body is a split JSON (see README); ?name=X or ?debtor=X&creditor=Y selects the statement
+    ms = _allocated_split()
+
+    try:
+        if "name" in request.args:
+            statement = participant_statement(ms, request.args["name"])
+        elif "debtor" in request.args and "creditor" in request.args:
+            statement = pair_statement(ms, request.args["debtor"], request.args["creditor"])
+        else:
+            statement = None
+    except KeyError as e:
+        abort(404, description=str(e.args[0]))
+    if statement is None:
+        abort(400, description="Pass ?name= or ?debtor=&creditor=.")
+    if ms.duplicate_rows:
+        # Repeated rows are kept in the totals; flag them so the client can check
+        statement["duplicate_rows"] = ms.duplicate_rows
+    return jsonify(statement)
+
+
+@bp.route("/report", methods=["POST"])
+def report_view():
+    # ?format=text|csv, ?name=X (repeatable) to filter, ?offset=&limit= to paginate statement rows
+    ms = _allocated_split()
+
+    names = request.args.getlist("name") or None
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", None, type=int)
+    if offset < 0 or (limit is not None and limit < 0):
+        abort(400, description="offset and limit must not be negative.")
+    unknown = [n for n in names or [] if n not in ms.names_map]
+    if unknown:
+        abort(404, description=f"Unknown participant(s): {', '.join(unknown)}")
+
+    if request.args.get("format") == "csv":
+        gen, mimetype = iter_csv_chunks(ms, names, offset, limit), "text/csv"
+    else:
+        gen, mimetype = iter_report_lines(ms, names, offset, limit), "text/plain"
+    return Response(stream_with_context(gen), mimetype=mimetype)
+
+
+# GROUP LEDGERS
+def _group_or_404(group_id):
+    ledger = get_group(group_id)
+    if ledger is None:
+        abort(404, description=f"Unknown group '{group_id}'.")
+    return ledger
+
+
+def _snapshot_json(snap):
+    return {"version": snap.version, "committed_at": snap.committed_at}
+
+
+def _snapshot_validators(group_id, snap):
+    # The ledger version changes on every commit, so it identifies the content.
+    # Last-Modified has whole-second resolution: it is the end of the commit's second,
+    # sent only once that second is over, so any later commit gets a later value.
+    end = int(snap.committed_at) + 1
+    modified = datetime.fromtimestamp(end, tz=timezone.utc) if time.time() >= end else None
+    return f"{group_id}-v{snap.version}", modified
+
+
+@bp.route("/groups/<group_id>", methods=["POST"])
+def group_create_view(group_id):
+    # Body: {"names": [...], "metadata": {"split_name": ...}}
+    body = request.get_json(force=True) or {}
+    try:
+        ledger = create_group(group_id, body.get("names", []),
+                              (body.get("metadata") or {}).get("split_name"))
+    except ValueError as e:
+        abort(409 if get_group(group_id) else 400, description=str(e))
+    return jsonify(_snapshot_json(ledger.snapshot())), 201
+
+
+@bp.route("/groups/<group_id>/transactions", methods=["POST"])
+def group_transactions_view(group_id):
+    # Body: one transaction (README format) or a list of them
+    ledger = _group_or_404(group_id)
+    body = request.get_json(force=True)
+    txs = body if isinstance(body, list) else [body]
+    # Whole upload is accepted or rejected in one vectorized validation pass
+    report = validate_ledger(txs, ledger.ms.names)
+    if not report.ok:
+        return jsonify(asdict(report)), 400
+    # Retried uploads are dropped by fingerprint; group commit applies every queued append
+    snap, stats = ledger.ingest(txs, check=False)
+    return jsonify(dict(_snapshot_json(snap), dedup=stats, dedup_totals=ledger.dedup_stats())), \
+        201 if stats["accepted"] else 200
+
+
+@bp.route("/groups/<group_id>/payments", methods=["POST"])
+def group_payments_view(group_id):
+    # Body: {"payer": ..., "payee": ..., "amount": ..., "note": ..., "timestamp": optional}
+    ledger = _group_or_404(group_id)
+    body = request.get_json(force=True) or {}
+    try:
+        snap = ledger.add_payment(body.get("payer"), body.get("payee"), body.get("amount"), body.get("note"),
+                                  timestamp=parse_timestamp(body.get("timestamp")))
+    except (TypeError, ValueError) as e:
+        abort(400, description=str(e))
+    return jsonify(_snapshot_json(snap)), 201
+
+
+@bp.route("/groups/<group_id>/balances", methods=["GET"])
+def group_balances_view(group_id):
+    snap = _group_or_404(group_id).snapshot()
+    etag, modified = _snapshot_validators(group_id, snap)
+    return _conditional(etag, modified, lambda: jsonify(dict(_snapshot_json(snap), balances=snap.balances())))
+
+
+@bp.route("/groups/<group_id>/matrix", methods=["GET"])
+def group_matrix_view(group_id):
+    # ?format=html renders matrix.html (tiled for large groups), JSON otherwise
+    snap = _group_or_404(group_id).snapshot()
+    etag, modified = _snapshot_validators(group_id, snap)
+    as_html = request.args.get("format") == "html"
+
+    def build():
+        if not as_html:
+            return jsonify(dict(_snapshot_json(snap), names=list(snap.names), matrix=snap.matrix.tolist()))
+        colnames = list(snap.names)
+        key = put_matrix(colnames, snap.matrix)
+        tiled = len(colnames) > FULL_RENDER_LIMIT
+        return render_template(
+            "matrix.html",
+            colnames=colnames,
+            matrix=None if tiled else snap.matrix.tolist(),
+            matrix_key=key,
+            tiled=tiled
+        )
+
+    return _conditional(f"{etag}-html" if as_html else etag, modified, build)
+
+
+@bp.route("/groups/<group_id>/settlement", methods=["GET"])
+def group_settlement_view(group_id):
+    # The ledger's incremental transfer plan, the same one the /events stream publishes
+    snap, transfers = _group_or_404(group_id).transfer_plan()
+    etag, modified = _snapshot_validators(group_id, snap)
+
+    def build():
+        return jsonify(dict(_snapshot_json(snap), transfers=transfers))
+
+    return _conditional(etag, modified, build)
+
+
+@bp.route("/groups/<group_id>/categories", methods=["GET"])
+def group_categories_view(group_id):
+    # ?name=X -> X's per-category breakdown, ?category=Y -> everyone in Y, both -> one cell
+    # Read from the published snapshot's cube: never waits on a commit
+    cube = _group_or_404(group_id).snapshot().cube
+    name, category = request.args.get("name"), request.args.get("category")
+    if name is not None and name not in cube.name_idx:
+        abort(404, description=f"Unknown participant '{name}'.")
+
+    if name is not None and category is not None:
+        return jsonify(category_cell(cube, name, category))
+    if name is not None:
+        return jsonify(category_breakdown(cube, name))
+    if category is not None:
+        return jsonify(category_totals(cube, category))
+    owed, paid = cube.owed.sum(axis=0), cube.paid.sum(axis=0)
+    return jsonify({cat: {"owed": float(o), "paid": float(p)} for cat, o, p in zip(cube.categories, owed, paid)})
+
+
+@bp.route("/groups/<group_id>/periods", methods=["POST"])
+def group_close_period_view(group_id):
+    # Body: {"cutoff": epoch seconds or ISO 8601, "archive": true|false}
+    ledger = _group_or_404(group_id)
+    body = request.get_json(force=True) or {}
+    try:
+        cutoff = parse_timestamp(body.get("cutoff"))
+        if cutoff is None:
+            raise ValueError("Cutoff is required.")
+        period, path = ledger.close_period(cutoff, archive=bool(body.get("archive")))
+    except ValueError as e:
+        abort(400, description=str(e))
+    return jsonify(dict(_snapshot_json(ledger.snapshot()), period=period_to_dict(period),
+                        archived=path is not None)), 201
+
+
+@bp.route("/groups/<group_id>/periods", methods=["GET"])
+def group_periods_view(group_id):
+    ledger = _group_or_404(group_id)
+    return jsonify([period_to_dict(p) for p in list(ledger.periods)])
+
+
+@bp.route("/groups/<group_id>/events", methods=["GET"])
+def group_events_view(group_id):
+    # Server-Sent Events: one full "snapshot" event, then an "update" per commit
+    # carrying only the changed balances and transfer-plan entries
+    ledger = _group_or_404(group_id)
+    q = ledger.subscribe()
+    snap, transfers = ledger.transfer_plan()
+
+    def sse(event, data, event_id):
+        return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def stream():
+        try:
+            yield sse("snapshot", dict(_snapshot_json(snap), balances=snap.balances(), transfers=transfers), snap.version)
+            while True:
+                try:
+                    event = q.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:   # dropped for falling behind; the client reconnects
+                    return
+                if event["version"] <= snap.version:
+                    continue        # already contained in the initial snapshot
+                yield sse("update", event, event["version"])
+        finally:
+            ledger.unsubscribe(q)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,169 @@
+# settlement_cache.py
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only a process-local lock is available, see SettlementCache
+    fcntl = None
+
+MAGIC = b"MXUICACH"
+HEADER = 64
+# Base name: the file actually used carries the geometry, e.g. matrix_ui_cache-32x2097152.bin
+DEFAULT_PATH = os.environ.get("MATRIX_UI_CACHE", os.path.join(tempfile.gettempdir(), "matrix_ui_cache.bin"))
+DEFAULT_SLOTS = 32
+DEFAULT_SLOT_SIZE = 2 << 20   # 2 MiB per entry (compressed), 64 MiB in all; bigger values are simply not cached
+
+# One index record per slot: hex sha1 of the key, last-use time, payload length (0 = empty)
+INDEX_DTYPE = np.dtype({
+    "names": ["key", "used", "len"],
+    "formats": ["S40", "<f8", "<u4"],
+    "offsets": [0, 40, 48],
+    "itemsize": 56,
+})
+
+
+def _dump(arrays):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
+
+def _load(payload):
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+def cache_path(base, slots, slot_size):
+    """File name for one geometry, so processes configured differently never share (or resize) a file."""
+    root, ext = os.path.splitext(base)
+    return f"{root}-{slots}x{slot_size}{ext or '.bin'}"
+
+
+class SettlementCache:
+    """
+    Cross-process LRU cache of numpy arrays in one mmap'd file.
+
+    Every worker process behind create_app() maps the same file, so a matrix
+    or transfer plan computed by one worker is a hit for all others, and the
+    cache survives restarts. Layout: header | slot index | fixed-size slots.
+    The index is small and scanned with numpy; eviction replaces the least
+    recently used slot. Access is serialised with flock on the file.
+
+    The file name carries the geometry (see cache_path) and an existing file
+    is never truncated or resized, so a process started with other settings
+    cannot wipe the file under live workers. On Windows there is no flock:
+    the lock only covers threads of one process, so run a single worker
+    process there (or give each worker its own MATRIX_UI_CACHE).
+    """
+
+    def __init__(self, path=DEFAULT_PATH, slots=DEFAULT_SLOTS, slot_size=DEFAULT_SLOT_SIZE):
+        path = cache_path(path, slots, slot_size)
+        self.path = path
+        self.pid = os.getpid()
+        self.slots = slots
+        self.slot_size = slot_size
+        self._data_offset = HEADER + slots * INDEX_DTYPE.itemsize
+        size = self._data_offset + slots * slot_size
+        self._thread_lock = threading.Lock()
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        foreign = False
+        with self._locked():
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            header = os.read(self._fd, HEADER)
+            current = os.fstat(self._fd).st_size
+            if current == 0 or (current == size and not header.strip(b"\0")):
+                # New file (or one whose creator died before writing the header): lay it out
+                os.ftruncate(self._fd, size)
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, MAGIC + np.array([slots, slot_size], dtype="<u8").tobytes())
+            else:
+                foreign = current != size or header[:8] != MAGIC or self._geometry(header) != (slots, slot_size)
+        if foreign:
+            os.close(self._fd)
+            raise ValueError(f"{path} is not a settlement cache with {slots} slots of {slot_size} bytes.")
+        self._mm = mmap.mmap(self._fd, size)
+        self._index = np.ndarray((slots,), dtype=INDEX_DTYPE, buffer=self._mm, offset=HEADER)
+
+    @staticmethod
+    def _geometry(header):
+        if len(header) < 24:
+            return None
+        slots, slot_size = np.frombuffer(header[8:24], dtype="<u8")
+        return int(slots), int(slot_size)
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest().encode("ascii")
+
+    def _find(self, digest):
+        hit = np.flatnonzero((self._index["key"] == digest) & (self._index["len"] > 0))
+        return int(hit[0]) if hit.size else None
+
+    def get(self, key):
+        """Return the stored {name: ndarray} dict, or None."""
+        digest = self._digest(key)
+        with self._locked():
+            slot = self._find(digest)
+            if slot is None:
+                return None
+            self._index["used"][slot] = time.time()
+            start = self._data_offset + slot * self.slot_size
+            payload = bytes(self._mm[start:start + int(self._index["len"][slot])])
+        return _load(payload)
+
+    def put(self, key, arrays):
+        """Store {name: ndarray}; returns False if the payload does not fit in a slot."""
+        payload = _dump(arrays)
+        if len(payload) > self.slot_size:
+            return False
+        digest = self._digest(key)
+        with self._locked():
+            slot = self._find(digest)
+            if slot is None:
+                empty = np.flatnonzero(self._index["len"] == 0)
+                slot = int(empty[0]) if empty.size else int(np.argmin(self._index["used"]))
+            self._index["len"][slot] = 0   # invalid while the payload is rewritten
+            start = self._data_offset + slot * self.slot_size
+            self._mm[start:start + len(payload)] = payload
+            self._index["key"][slot] = digest
+            self._index["used"][slot] = time.time()
+            self._index["len"][slot] = len(payload)
+        return True
+
+    def clear(self):
+        with self._locked():
+            self._index["len"][:] = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The per-process handle on the shared cache file (opened on first use)."""
+    global _cache
+    # flock belongs to the open file, so a handle inherited through fork must be reopened
+    if _cache is None or _cache.pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache.pid != os.getpid():
+                _cache = SettlementCache()
+    return _cache
@@ -0,0 +1,142 @@
+document.addEventListener("DOMContentLoaded", () => {
+  const viewport = document.getElementById("tileViewport");
+  if (!viewport) return;
+
+  const spacer  = document.getElementById("tileSpacer");
+  const table   = document.getElementById("tileTable");
+  const size    = parseInt(viewport.dataset.size, 10);
+  const tileUrl = viewport.dataset.tileUrl;
+
+  const TILE    = 50;   // rows/cols per fetched tile
+  const CELL_W  = 101;  // rendered cell width incl. padding + border
+  const CELL_H  = 25;   // rendered cell height incl. padding + border
+
+  const tiles    = new Map();  // "r,c" -> tile JSON
+  const inFlight = new Map();  // "r,c" -> Promise
+  const failed   = new Map();  // "r,c" -> error message; never re-requested
+
+  // One extra row/column for the headers
+  spacer.style.width  = `${(size + 1) * CELL_W}px`;
+  spacer.style.height = `${(size + 1) * CELL_H}px`;
+
+  viewport.addEventListener("scroll", () => window.requestAnimationFrame(render));
+  window.addEventListener("resize", render);
+  render();
+
+  function fetchTile(tr, tc) {
+    const key = `${tr},${tc}`;
+    if (tiles.has(key)) return Promise.resolve(tiles.get(key));
+    if (inFlight.has(key)) return inFlight.get(key);
+    if (failed.has(key)) return Promise.resolve(null);
+
+    const url = `${tileUrl}?row=${tr * TILE}&col=${tc * TILE}&rows=${TILE}&cols=${TILE}`;
+    const p = fetch(url)
+      .then(res => {
+        if (!res.ok) throw new Error(`Tile ${key} failed: ${res.status}`);
+        return res.json();
+      })
+      .then(tile => {
+        tiles.set(key, tile);
+        inFlight.delete(key);
+        return tile;
+      })
+      .catch(err => {
+        // Recorded so render() shows an error cell instead of fetching it again
+        inFlight.delete(key);
+        failed.set(key, err.message);
+        console.error(err);
+        return null;
+      });
+    inFlight.set(key, p);
+    return p;
+  }
+
+  function visibleWindow() {
+    const r0 = Math.max(0, Math.floor(viewport.scrollTop / CELL_H) - 1);
+    const c0 = Math.max(0, Math.floor(viewport.scrollLeft / CELL_W) - 1);
+    const r1 = Math.min(size, r0 + Math.ceil(viewport.clientHeight / CELL_H) + 1);
+    const c1 = Math.min(size, c0 + Math.ceil(viewport.clientWidth / CELL_W) + 1);
+    return { r0, c0, r1, c1 };
+  }
+
+  function tileError(i, j) {
+    return failed.get(`${Math.floor(i / TILE)},${Math.floor(j / TILE)}`);
+  }
+
+  function cellValue(i, j) {
+    const tile = tiles.get(`${Math.floor(i / TILE)},${Math.floor(j / TILE)}`);
+    if (!tile) return null;
+    return tile.cells[i - tile.row][j - tile.col];
+  }
+
+  function rowName(i) {
+    const tile = tiles.get(`${Math.floor(i / TILE)},0`) || findTileForRow(i);
+    return tile ? tile.row_names[i - tile.row] : "";
+  }
+
+  function colName(j) {
+    for (const tile of tiles.values()) {
+      if (j >= tile.col && j < tile.col + tile.col_names.length) return tile.col_names[j - tile.col];
+    }
+    return "";
+  }
+
+  function findTileForRow(i) {
+    for (const tile of tiles.values()) {
+      if (i >= tile.row && i < tile.row + tile.row_names.length) return tile;
+    }
+    return null;
+  }
+
+  function render() {
+    const { r0, c0, r1, c1 } = visibleWindow();
+
+    // Fetch every tile that intersects the window, re-render as they arrive
+    const pending = [];
+    for (let tr = Math.floor(r0 / TILE); tr <= Math.floor((r1 - 1) / TILE); tr++) {
+      for (let tc = Math.floor(c0 / TILE); tc <= Math.floor((c1 - 1) / TILE); tc++) {
+        const key = `${tr},${tc}`;
+        if (!tiles.has(key) && !failed.has(key)) pending.push(fetchTile(tr, tc));
+      }
+    }
+    if (pending.length) Promise.all(pending).then(render);
+
+    const fragment = document.createDocumentFragment();
+    const header = document.createElement("tr");
+    header.className = "col-names";
+    header.appendChild(document.createElement("th"));
+    for (let j = c0; j < c1; j++) {
+      const th = document.createElement("th");
+      th.textContent = colName(j);
+      header.appendChild(th);
+    }
+    fragment.appendChild(header);
+
+    for (let i = r0; i < r1; i++) {
+      const tr = document.createElement("tr");
+      const th = document.createElement("th");
+      th.className = "row-name";
+      th.textContent = rowName(i);
+      tr.appendChild(th);
+      for (let j = c0; j < c1; j++) {
+        const td = document.createElement("td");
+        const error = tileError(i, j);
+        const v = cellValue(i, j);
+        if (error) {
+          td.textContent = "⚠";
+          td.title = error;
+          td.className = "error";
+        } else {
+          td.textContent = v === null ? "…" : v.toFixed(2);
+          if (v === 0) td.className = "zero";
+        }
+        tr.appendChild(td);
+      }
+      fragment.appendChild(tr);
+    }
+
+    table.innerHTML = "";
+    table.appendChild(fragment);
+    table.style.transform = `translate(${c0 * CELL_W}px, ${r0 * CELL_H}px)`;
+  }
+});
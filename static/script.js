@@ -11,6 +11,7 @@ document.addEventListener("DOMContentLoaded", () => {
   sizeInput.addEventListener("change", rebuildTable);
   addRowBtn.addEventListener("click", addRow);
   addColBtn.addEventListener("click", addColumn);
+  document.getElementById("gridForm").addEventListener("submit", submitCompact);
 
   rebuildTable();
 
@@ -400,4 +401,63 @@ document.addEventListener("DOMContentLoaded", () => {
       avgInput.value = "0";
     }
   }
-});
\ No newline at end of file
+
+  // Build one compact JSON payload: names once, and per row only the
+  // checked participant indices and explicit amounts (0-based).
+  function buildCompactPayload() {
+    const names = getColNames();
+    const nameIdx = new Map(names.map((name, idx) => [name, idx]));
+    const rows = [];
+
+    document.querySelectorAll("tr.data-row").forEach(row => {
+      const i = row.dataset.row;
+      const toggle = row.querySelector(`[name="toggle_${i}"]`).checked;
+      const paidBy = row.querySelector(`[name="paidby_${i}"]`).value;
+
+      const checked = [];
+      row.querySelectorAll(`input[name^="chk_${i}_"]:checked`).forEach(cb => {
+        checked.push(Number(cb.name.split("_")[2]) - 1);
+      });
+
+      const detail = [];
+      if (toggle) {
+        const det = document.getElementById(`detail_${i}`);
+        if (det) {
+          det.querySelectorAll(`input[name^="detail_${i}_"]`).forEach(inp => {
+            const v = parseFloat(inp.value);
+            if (v) detail.push([Number(inp.name.split("_")[2]) - 1, v]);
+          });
+        }
+      }
+
+      rows.push({
+        title:   row.querySelector(`[name="title_${i}"]`).value,
+        amount:  parseFloat(row.querySelector(`[name="amount_${i}"]`).value) || 0,
+        paid_by: nameIdx.has(paidBy) ? nameIdx.get(paidBy) : null,
+        toggle:  toggle,
+        checked: checked,
+        detail:  detail
+      });
+    });
+
+    return { names, rows };
+  }
+
+  function submitCompact(e) {
+    // Validation in index.html runs first and cancels the submit on errors
+    if (e.defaultPrevented) return;
+    e.preventDefault();
+
+    fetch(e.target.action, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(buildCompactPayload())
+    })
+      .then(res => res.text())
+      .then(html => {
+        document.open();
+        document.write(html);
+        document.close();
+      });
+  }
+});
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Modules import each other as `Dataclass.*` / `logic.*` from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+NAMES = ["A", "B", "C"]
+
+
+def tx(amount=30.0, paid_by="A", names=NAMES, **kw):
+    """One split-JSON transaction: amount split evenly over names, paid by paid_by."""
+    return dict({"title": "t", "amount": amount, "paid_by": paid_by, "even_split": True,
+                 "checked_names": list(names)}, **kw)
+
+
+@pytest.fixture(autouse=True)
+def settlement_cache_file(tmp_path_factory, monkeypatch):
+    """Give every test its own cache file instead of the shared one in the temp dir."""
+    import settlement_cache
+
+    path = str(tmp_path_factory.mktemp("cache") / "cache.bin")
+    cache = settlement_cache.SettlementCache(path, slots=8, slot_size=1 << 20)
+    monkeypatch.setattr(settlement_cache, "_cache", cache)
+    monkeypatch.setenv("MATRIX_UI_CACHE", path)   # for spawned child processes
+    return cache
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
@@ -0,0 +1,74 @@
+import asyncio
+import html
+import json
+
+import pytest
+
+import asgi
+
+
+def post_matrix(body, content_type=b"application/json"):
+    """Run POST /matrix through the native ASGI endpoint; returns (status, body)."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/matrix", "headers": [(b"content-type", content_type)]}
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]["status"], sent[1]["body"]
+
+
+@pytest.mark.parametrize("body", [
+    {"names": ["A"], "rows": [1]},
+    {"rows": []},
+    [1, 2],
+    {"names": ["A", "B"], "rows": [{"amount": "lots", "paid_by": 0, "checked": [0, 1]}]},
+])
+def test_malformed_json_is_a_400_with_the_flask_message(client, body):
+    status, text = post_matrix(json.dumps(body).encode())
+    flask_resp = client.post("/matrix", json=body)
+    assert status == flask_resp.status_code == 400
+    assert text.decode() in html.unescape(flask_resp.get_data(as_text=True))
+
+
+def test_unparseable_json_and_bad_form_fields_are_400():
+    assert post_matrix(b"{not json")[0] == 400
+    assert post_matrix(b"size=2&row_count=x", b"application/x-www-form-urlencoded")[0] == 400
+    assert post_matrix(b"row_count=1", b"application/x-www-form-urlencoded")[0] == 400
+
+
+def test_valid_submission_renders_the_page():
+    body = {"names": ["A", "B"], "rows": [{"title": "t", "amount": 10, "paid_by": 0, "checked": [0, 1]}]}
+    status, page = post_matrix(json.dumps(body).encode())
+    assert status == 200 and b"<" in page
+
+
+def test_oversized_body_is_a_413(monkeypatch):
+    monkeypatch.setattr(asgi, "MAX_BODY", 16)
+    status, text = post_matrix(b'{"names": ["A", "B", "C"], "rows": []}')
+    assert status == 413 and b"16 bytes" in text
+
+
+def test_pool_and_request_threads_share_the_stores_safely(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import matrix_store
+    from logic import split_render
+
+    monkeypatch.setattr(matrix_store, "MAX_ENTRIES", 4)
+    monkeypatch.setattr(matrix_store, "SHARED_CACHE", False)
+
+    def work(i):
+        key = matrix_store.put_matrix(["A", "B"], [[0, i % 16], [0, 0]])
+        matrix_store.get_matrix(key)
+        split_render._lru_put(split_render._image_cache, ("t", i % 16), b"x", 4)
+        split_render._lru_get(split_render._image_cache, ("t", (i + 1) % 16))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(5000)))
+    assert len(matrix_store._store) <= 4 and len(split_render._image_cache) <= 4
@@ -0,0 +1,51 @@
+import pytest
+
+from Dataclass.splitDataclass import fingerprint, parse_initial_input
+from Dataclass.splitLedger import ConcurrentLedger
+from conftest import NAMES, tx
+
+
+def test_identical_rows_without_client_id_are_two_expenses():
+    assert fingerprint(tx()) is None
+    ms = parse_initial_input({"names": NAMES, "transactions": [tx(), tx()]})
+    assert len(ms.transactions) == 2
+    assert ms.duplicate_rows == []
+
+
+def test_parse_reports_repeated_client_id_and_keeps_the_row():
+    rows = [tx(client_id="x1"), tx(client_id="x2"), tx(client_id="x1")]
+    ms = parse_initial_input({"names": NAMES, "transactions": rows})
+    assert len(ms.transactions) == 3
+    assert ms.duplicate_rows == [2]
+
+
+def test_same_client_timestamp_is_a_retry():
+    assert fingerprint(tx(timestamp=100)) == fingerprint(tx(timestamp=100))
+    assert fingerprint(tx(timestamp=100)) != fingerprint(tx(timestamp=101))
+
+
+def test_ledger_keeps_identical_expenses_without_client_id():
+    ledger = ConcurrentLedger(NAMES)
+    assert ledger.append(tx()) and ledger.append(tx())
+    ledger.commit()
+    assert ledger.snapshot().balances()["A"] == pytest.approx(40)
+
+
+def test_ledger_drops_client_id_retries_queued_or_committed():
+    ledger = ConcurrentLedger(NAMES)
+    assert ledger.append(tx(client_id="x1"))
+    assert not ledger.append(tx(client_id="x1"))   # still queued
+    ledger.commit()
+    _, stats = ledger.ingest([tx(client_id="x1"), tx(client_id="x2")])
+    assert stats["duplicate_rows"] == [0]
+    assert ledger.dedup_stats() == {"accepted": 2, "duplicates": 2, "indexed": 2, "queued": 0}
+
+
+def test_failed_commit_releases_its_fingerprints():
+    ledger = ConcurrentLedger(NAMES)
+    ledger.append(tx(client_id="x1", amount="30"), check=False)   # fails in allocation
+    with pytest.raises(TypeError):
+        ledger.commit()
+    assert ledger.dedup_stats()["queued"] == 0
+    assert ledger.append(tx(client_id="x1"), commit=True)
+    assert ledger.snapshot().balances()["A"] == pytest.approx(20)
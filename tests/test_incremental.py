@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from logic.split_constrained import net_in_cents
+from logic.split_incremental import balance_delta, plan_from_matrix, plan_to_matrix, resettle_incremental
+from logic.split_logics import settle_greedy
+
+
+def net(M):
+    return M.sum(axis=0) - M.sum(axis=1)
+
+
+def assert_matches_fresh_settle(settled, owe):
+    fresh = settle_greedy(owe, [str(i) for i in range(len(owe))])
+    assert (net_in_cents(settled) == net_in_cents(fresh)).all()
+    # Nobody both pays and receives, so the volume is exactly what a fresh settle moves
+    assert not ((settled > 0).any(axis=0) & (settled > 0).any(axis=1)).any()
+    assert settled.sum() == pytest.approx(fresh.sum())
+
+
+def test_a_participant_settled_to_zero_keeps_no_transfers():
+    plan = plan_from_matrix([[0, 0, 10], [0, 0, 0], [0, 0, 0]])   # A pays C 10
+    resettle_incremental(plan, {0: 10, 1: -10})                   # B now owes A's share
+    settled = plan_to_matrix(plan, 3)
+    assert not settled[0].any() and not settled[:, 0].any()
+    assert settled[1, 2] == pytest.approx(10)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_plan_matches_a_fresh_settle(seed):
+    rng = np.random.default_rng(seed)
+    n = 8
+    owe = np.zeros((n, n))
+    plan = plan_from_matrix(owe)
+    for _ in range(20):
+        i, j = rng.choice(n, 2, replace=False)
+        new = owe.copy()
+        new[i, j] += round(rng.uniform(1, 50), 2)
+        resettle_incremental(plan, balance_delta(net(owe), net(new)))
+        owe = new
+        assert_matches_fresh_settle(plan_to_matrix(plan, n), owe)
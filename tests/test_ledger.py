@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from Dataclass.splitLedger import ConcurrentLedger
+from conftest import NAMES, tx
+
+
+def balances(ledger):
+    return ledger.snapshot().balances()
+
+
+def test_commit_publishes_balances_and_matrix():
+    ledger = ConcurrentLedger(NAMES)
+    ledger.append(tx())
+    snap = ledger.commit()
+    assert snap.version == 1
+    assert balances(ledger) == pytest.approx({"A": 20, "B": -10, "C": -10})
+    assert snap.matrix[1, 0] == pytest.approx(10)
+    assert sum(snap.net) == pytest.approx(0)
+
+
+def test_invalid_transaction_is_rejected_before_queueing():
+    ledger = ConcurrentLedger(NAMES)
+    with pytest.raises(ValueError):
+        ledger.append(tx(amount="12"))
+    with pytest.raises(ValueError):
+        ledger.ingest([tx(), tx(paid_by="Z")])
+    assert ledger.commit().version == 0
+    assert ledger.ms.transactions == []
+
+
+def test_failed_commit_rolls_back_the_whole_batch():
+    ledger = ConcurrentLedger(NAMES)
+    ledger.append(tx())
+    ledger.commit()
+    before = balances(ledger)
+
+    ledger.append(tx(amount=9.0, paid_by="B"))
+    ledger.append(tx(amount="12", paid_by="C"), check=False)   # bypasses validation, fails in allocation
+    with pytest.raises(TypeError):
+        ledger.commit()
+    assert len(ledger.ms.transactions) == 1
+    assert {n: ledger.ms.names_map[n].net_balance for n in NAMES} == pytest.approx(before)
+    assert balances(ledger) == pytest.approx(before)
+
+    ledger.append(tx(amount=12.0, paid_by="C"))
+    snap = ledger.commit()
+    assert sum(snap.net) == pytest.approx(0)
+    assert balances(ledger) == pytest.approx({"A": 16, "B": -14, "C": -2})
+    assert snap.matrix.sum(axis=0) - snap.matrix.sum(axis=1) == pytest.approx(list(snap.net))
+
+
+def test_payments_settle_balances():
+    ledger = ConcurrentLedger(NAMES)
+    ledger.append(tx(), commit=True)
+    ledger.add_payment("B", "A", 10)
+    assert balances(ledger) == pytest.approx({"A": 10, "B": 0, "C": -10})
+    with pytest.raises(ValueError):
+        ledger.add_payment("B", "B", 10)
+
+
+def test_category_reads_use_the_snapshot_without_the_commit_lock(client):
+    from Dataclass.splitLedger import get_group
+
+    client.post("/groups/g-cat", json={"names": NAMES})
+    assert client.get("/groups/g-cat/categories?name=A").get_json() == {}
+    client.post("/groups/g-cat/transactions", json=[tx(category="Food"), tx(amount=9.0, paid_by="B")])
+
+    ledger = get_group("g-cat")
+    with ledger._commit_lock:   # a commit in progress does not block readers
+        assert client.get("/groups/g-cat/categories?name=A&category=Food").get_json() == \
+            {"owed": pytest.approx(10), "paid": pytest.approx(30)}
+        totals = client.get("/groups/g-cat/categories").get_json()
+    assert set(totals) == {"Food", "Uncategorized"}
+    assert totals["Uncategorized"]["paid"] == pytest.approx(9)
+    assert client.get("/groups/g-cat/categories?name=Z").status_code == 404
+    assert not ledger.snapshot().cube.owed.flags.writeable
+
+
+def test_settlement_route_serves_the_plan_the_events_publish(client):
+    from Dataclass.splitLedger import get_group
+
+    client.post("/groups/g-plan", json={"names": NAMES})
+    client.post("/groups/g-plan/transactions", json=[tx(), tx(amount=12.0, paid_by="B")])
+    before = client.get("/groups/g-plan/settlement").get_json()
+
+    resp = client.get("/groups/g-plan/events")
+    first = next(resp.response).decode()
+    resp.close()
+    assert json.loads(first.split("data: ", 1)[1])["transfers"] == before["transfers"]
+
+    q = get_group("g-plan").subscribe()
+    client.post("/groups/g-plan/transactions", json=[tx(amount=60.0, paid_by="C", names=("A", "C"))])
+    event = q.get(timeout=1)
+    plan = {(t["from"], t["to"]): t["amount"] for t in before["transfers"]}
+    for change in event["transfers"]:
+        plan[change["from"], change["to"]] = change["new"]
+    after = client.get("/groups/g-plan/settlement").get_json()
+    assert after["version"] == event["version"]
+    assert {k: v for k, v in plan.items() if v} == {(t["from"], t["to"]): t["amount"] for t in after["transfers"]}
+
+
+def test_commit_copies_only_the_rows_it_touches():
+    ledger = ConcurrentLedger(["A", "B", "C", "D"])
+    ledger.append(tx(category="Food"), commit=True)
+    before = ledger.snapshot()
+    ledger.append(tx(amount=8.0, paid_by="B", names=("A", "B"), category="Taxi"), commit=True)
+    after = ledger.snapshot()
+    assert after.rows[2] is before.rows[2] and after.rows[3] is before.rows[3]
+    assert after.rows[0] is not before.rows[0]
+    assert after.cube_rows[2] is before.cube_rows[2]
+    assert not after.matrix.flags.writeable and not after.rows[0].flags.writeable
+    assert after.matrix[0, 1] == pytest.approx(4)
+    # C's row predates "Taxi": read back as 0 there
+    assert after.cube.categories == ["Food", "Taxi"]
+    assert after.cube.owed[2].tolist() == pytest.approx([10, 0])
+
+
+def test_failed_ingest_leaves_nothing_behind():
+    ledger = ConcurrentLedger(NAMES, batch_size=2)
+    rows = [tx(amount=float(i + 1), client_id=f"r{i}") for i in range(5)]
+    rows[3] = tx(amount="12", client_id="r3")   # bypasses validation, fails in allocation
+    with pytest.raises(TypeError):
+        ledger.ingest(rows, check=False)
+    assert ledger.snapshot().version == 0 and ledger.ms.transactions == []
+
+    rows[3] = tx(amount=4.0, client_id="r3")
+    snapshot, stats = ledger.ingest(rows)
+    assert snapshot.version == 1 and stats["accepted"] == 5
@@ -0,0 +1,15 @@
+import os
+
+from loadtest import percentile, run_size_isolated
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+
+
+def test_isolated_run_reports_one_size(monkeypatch):
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    row = run_size_isolated(None, 3, 4, 2, "json")   # spawned child, in-process test client
+    assert row["size"] == 3 and row["errors"] == 0
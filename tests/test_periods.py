@@ -0,0 +1,91 @@
+from functools import partial
+
+import pytest
+
+import conftest
+from Dataclass.splitDataclass import (
+    parse_initial_input, new_compute_allocations, period_from_dict,
+)
+from Dataclass.splitLedger import ConcurrentLedger
+from Dataclass import splitPeriods
+from Dataclass.splitPeriods import archive_period, close_period, load_archive
+
+NAMES = conftest.NAMES
+tx = partial(conftest.tx, timestamp=100)   # before the cutoff the tests close at
+
+
+def balances(ms):
+    return {name: ms.names_map[name].net_balance for name in ms.names}
+
+
+def allocated(transactions, payments=()):
+    return new_compute_allocations(parse_initial_input(
+        {"names": NAMES, "transactions": transactions, "payments": list(payments)}))
+
+
+def test_close_keeps_balances_and_later_payments_open():
+    ms = allocated([tx(), tx(amount=9.0, paid_by="B", timestamp=300)],
+                   [{"payer": "B", "payee": "A", "amount": 5, "timestamp": 150},
+                    {"payer": "C", "payee": "A", "amount": 4, "timestamp": 350}])
+    before = balances(ms)
+    snapshot, closed, payments = close_period(ms, 200)
+    assert len(closed) == 1 and [p.amount for p in payments] == [5]
+    assert [p.amount for p in ms.payments] == [4]
+    assert ms.payment_totals == {("C", "A"): 4}
+    assert balances(ms) == pytest.approx(before)
+    assert snapshot.balances == pytest.approx({"A": 15, "B": -5, "C": -10})
+
+
+@pytest.mark.parametrize("bad", [
+    tx(checked_names=["A", "B", "Z"]),
+    tx(even_split=False, checked_names=["A", "B"], uneven_split_map={"A": 10, "B": 5}),
+])
+def test_close_refuses_transactions_it_cannot_carry(bad):
+    ms = allocated([tx(), bad])
+    before = balances(ms)
+    with pytest.raises(ValueError, match="Cannot close"):
+        close_period(ms, 200)
+    assert ms.opening is None and len(ms.transactions) == 2
+    assert balances(ms) == pytest.approx(before)
+
+
+def test_opening_without_cutoff_can_be_closed_again():
+    ms = allocated([tx()])
+    ms.opening = period_from_dict({"period": 1, "balances": {}})
+    assert ms.opening.cutoff is None
+    snapshot, _, _ = close_period(ms, 200)
+    assert snapshot.period == 2
+
+
+def test_ledger_close_keeps_open_payments_in_the_matrix():
+    ledger = ConcurrentLedger(NAMES)
+    ledger.append(tx(), commit=True)
+    ledger.add_payment("B", "A", 10, timestamp=300)
+    before = ledger.snapshot()
+    ledger.close_period(200)
+    after = ledger.snapshot()
+    assert after.balances() == pytest.approx(before.balances())
+    assert after.matrix.sum(axis=0) - after.matrix.sum(axis=1) == pytest.approx(list(after.net))
+    assert len(ledger.ms.payments) == 1
+
+
+def test_archives_of_groups_with_the_same_name_do_not_collide(tmp_path, monkeypatch):
+    monkeypatch.setattr(splitPeriods, "ARCHIVE_DIR", str(tmp_path))
+    paths = []
+    for group_id, amount in (("g-one", 30.0), ("g-two", 60.0)):
+        ledger = ConcurrentLedger(NAMES, group_id=group_id)   # both use the default split_name
+        ledger.append(tx(amount=amount), commit=True)
+        paths.append(ledger.close_period(200, archive=True)[1])
+    assert len(set(paths)) == 2
+    assert [load_archive(p)["transactions"][0]["amount"] for p in paths] == [30.0, 60.0]
+
+
+@pytest.mark.parametrize("prefix", ["../escape", "a/b", "a\\b", ""])
+def test_archive_rejects_names_that_leave_the_directory(tmp_path, prefix):
+    snapshot, closed, payments = close_period(allocated([tx()]), 200)
+    with pytest.raises(ValueError):
+        archive_period(snapshot, closed, payments, prefix=prefix, directory=str(tmp_path / "archive"))
+    assert not any(tmp_path.iterdir())
+    if prefix:
+        with pytest.raises(ValueError):
+            ConcurrentLedger(NAMES, group_id=prefix)
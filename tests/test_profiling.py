@@ -0,0 +1,49 @@
+import itertools
+
+from flask import Flask, Response
+
+from profiling import ProfilingMiddleware
+
+TOKEN = "s3cret"
+
+
+def make_client(tmp_path):
+    app = Flask(__name__)
+
+    @app.route("/ping")
+    def ping():
+        return "pong"
+
+    @app.route("/events")
+    def events():
+        # Never ends, like the group event stream
+        return Response((f"data: {i}\n\n" for i in itertools.count()), mimetype="text/event-stream")
+
+    middleware = ProfilingMiddleware(app.wsgi_app, TOKEN, directory=str(tmp_path))
+    app.wsgi_app = middleware
+    return app.test_client(), middleware
+
+
+def test_token_only_in_the_header(tmp_path):
+    client, _ = make_client(tmp_path)
+    resp = client.get("/ping", headers={"X-Profile-Token": TOKEN})
+    assert resp.data == b"pong" and (tmp_path / resp.headers["X-Profile-File"]).exists()
+    assert "X-Profile-File" not in client.get(f"/ping?profile={TOKEN}").headers
+    assert "X-Profile-File" not in client.get("/ping", headers={"X-Profile-Token": "wrong"}).headers
+
+
+def test_streams_are_passed_through_unprofiled(tmp_path):
+    client, _ = make_client(tmp_path)
+    for headers in ({"X-Profile-Token": TOKEN}, {"X-Profile-Token": TOKEN, "Accept": "text/event-stream"}):
+        resp = client.get("/events", headers=headers, buffered=False)
+        assert resp.headers["X-Profile-Skipped"]
+        assert next(resp.response) == b"data: 0\n\n"
+        resp.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_profile_gets_409(tmp_path):
+    client, middleware = make_client(tmp_path)
+    with middleware._busy:
+        assert client.get("/ping", headers={"X-Profile-Token": TOKEN}).status_code == 409
+    assert client.get("/ping", headers={"X-Profile-Token": TOKEN}).status_code == 200
@@ -0,0 +1,55 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from logic.split_logics import print_graph, process_matrix
+from logic.split_render import render_stage
+
+
+def test_render_path_never_shows_a_window(tmp_path, monkeypatch):
+    def show(*args, **kwargs):
+        raise AssertionError("plt.show() called")
+
+    monkeypatch.setattr(plt, "show", show)
+    M = np.array([[0, 5.0], [2.0, 0]])
+    monkeypatch.setattr("logic.split_logics.PRINT_GRAPH", True)
+    monkeypatch.setattr("logic.split_logics.GRAPH_DIR", str(tmp_path))
+    process_matrix(M, ["A", "B"])
+    assert render_stage(M, ["A", "B"], "settled").startswith(b"\x89PNG")
+
+
+def test_print_graph_writes_a_png(tmp_path, monkeypatch):
+    monkeypatch.setattr("logic.split_logics.GRAPH_DIR", str(tmp_path))
+    path = print_graph(np.array([[0, 5.0], [0, 0]]), ["A", "B"], "Step 1")
+    with open(path, "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_stage_png():
+    image = render_stage(np.array([[0, 5.0], [2.0, 0]]), ["A", "B"], "bidirectional")
+    assert image.startswith(b"\x89PNG")
+
+
+def test_render_stage_top_k_zero_draws_no_labelled_transfers(monkeypatch):
+    import logic.split_render as split_render
+
+    seen = []
+    build = split_render.build_sparse_graph
+    monkeypatch.setattr(split_render, "build_sparse_graph",
+                        lambda *args: seen.append(args[4]) or build(*args))
+    M = np.array([[0, 5.0, 1.0], [0, 0, 2.0], [0, 0, 0]])
+    render_stage(M, ["A", "B", "C"], "original", top_k=0)
+    assert seen == [0]
+
+
+def test_graph_route_clamps_top_k(client, monkeypatch):
+    import routes
+    from matrix_store import put_matrix
+
+    seen = []
+    monkeypatch.setattr(routes, "render_stage", lambda *args, top_k=None: seen.append(top_k) or b"png")
+    key = put_matrix(["A", "B"], np.array([[0, 5.0], [0, 0]]))
+    for value, expected in (("100000", routes.MAX_TOP_K), ("-3", 0), ("7", 7)):
+        assert client.get(f"/matrix/{key}/graph/original.png?top_k={value}").status_code == 200
+        assert seen.pop() == expected
+    assert client.get(f"/matrix/{key}/graph/original.png").status_code == 200
+    assert seen.pop() is None
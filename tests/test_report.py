@@ -0,0 +1,50 @@
+from Dataclass.splitDataclass import parse_initial_input, new_compute_allocations
+from Dataclass.splitReport import iter_statement_rows
+from conftest import NAMES
+
+SPLIT = {
+    "names": NAMES,
+    "transactions": [
+        {"title": f"t{i}", "amount": 30.0, "paid_by": "A", "even_split": True, "checked_names": NAMES}
+        for i in range(4)
+    ],
+}
+
+
+def ms():
+    return new_compute_allocations(parse_initial_input(SPLIT))
+
+
+def test_pages_cover_every_row_once():
+    all_rows = list(iter_statement_rows(ms()))
+    assert len(all_rows) == 12
+    pages = [list(iter_statement_rows(ms(), offset=o, limit=5)) for o in (0, 5, 10)]
+    assert [len(p) for p in pages] == [5, 5, 2]
+    assert sum(pages, []) == all_rows
+
+
+def test_negative_offset_and_limit_are_clamped():
+    assert list(iter_statement_rows(ms(), offset=-3, limit=2)) == list(iter_statement_rows(ms(), limit=2))
+    assert list(iter_statement_rows(ms(), limit=-1)) == []
+
+
+def test_report_route_rejects_negative_pagination(client):
+    assert client.post("/report?offset=-1", json=SPLIT).status_code == 400
+    assert client.post("/report?limit=-5", json=SPLIT).status_code == 400
+    assert client.post("/report?offset=2&limit=3&format=csv", json=SPLIT).status_code == 200
+
+
+def test_paging_reuses_the_allocation_of_the_same_body(client, monkeypatch):
+    import routes
+
+    calls = []
+    allocate = routes.new_compute_allocations
+    monkeypatch.setattr(routes, "new_compute_allocations", lambda ms: calls.append(1) or allocate(ms))
+    monkeypatch.setattr(routes, "_allocations", type(routes._allocations)())
+    pages = [client.post(f"/report?offset={o}&limit=5&format=csv", json=SPLIT).get_data() for o in (0, 5, 10)]
+    assert client.post("/statement?name=B", json=SPLIT).status_code == 200
+    assert len(calls) == 1 and all(pages)
+
+    other = dict(SPLIT, transactions=SPLIT["transactions"][:1])
+    assert client.post("/statement?name=B", json=other).get_json()["shares"][0]["title"] == "t0"
+    assert len(calls) == 2
@@ -0,0 +1,93 @@
+import pytest
+
+
+def payload(**rows_kw):
+    row = dict({"title": "Lunch", "amount": 30, "paid_by": 0, "toggle": False, "checked": [0, 1, 2]}, **rows_kw)
+    return {"names": ["A", "B", "C"], "rows": [row]}
+
+
+def test_matrix_accepts_the_compact_json(client):
+    assert client.post("/matrix", json=payload()).status_code == 200
+
+
+@pytest.mark.parametrize("body", [
+    {"names": ["A"], "rows": [1]},
+    {"names": ["A"], "rows": ["x"]},
+    {"names": ["A"], "rows": 5},
+    {"rows": []},
+    {"names": "AB", "rows": []},
+    [1, 2],
+    "text",
+    payload(paid_by=7),
+    payload(checked=["x"]),
+    payload(amount="lots"),
+    payload(detail=[[0]]),
+    payload(detail=5),
+])
+def test_matrix_rejects_malformed_json_with_400(client, body):
+    resp = client.post("/matrix", json=body)
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("detail", [[[0, 40]], [[0, 20], [1, 20]], [[1, -5]]])
+def test_matrix_rejects_bad_uneven_shares(client, detail):
+    resp = client.post("/matrix", json=payload(toggle=True, detail=detail))
+    assert resp.status_code == 400
+    assert resp.get_json()["errors"][0]["field"] == "uneven_split_map"
+
+
+def test_matrix_ignores_share_totals_of_an_even_split(client):
+    assert client.post("/matrix", json=payload(toggle=False, detail=[[0, 40]])).status_code == 200
+
+
+def test_matrix_error_names_the_row(client):
+    body = {"names": ["A", "B"], "rows": [payload()["rows"][0], 1]}
+    body["rows"][0]["checked"] = [0, 1]
+    resp = client.post("/matrix", json=body)
+    assert resp.status_code == 400
+    assert b"Row 1" in resp.data
+
+
+def test_matrix_rejects_unparseable_json(client):
+    resp = client.post("/matrix", data="{not json", content_type="application/json")
+    assert resp.status_code == 400
+
+
+def test_last_modified_is_not_sent_within_the_commit_second(client, monkeypatch):
+    import routes
+
+    client.post("/groups/g-lm", json={"names": ["A", "B"]})
+    client.post("/groups/g-lm/transactions", json={"title": "x", "amount": 10, "paid_by": "A",
+                                                   "even_split": True, "checked_names": ["A", "B"]})
+    committed_at = client.get("/groups/g-lm/balances").get_json()["committed_at"]
+
+    # Same second as the commit: a second commit could still land in it
+    monkeypatch.setattr(routes.time, "time", lambda: committed_at)
+    resp = client.get("/groups/g-lm/balances", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert resp.status_code == 200
+    assert resp.last_modified is None
+
+    # Once the second is over, Last-Modified is its end and answers If-Modified-Since
+    monkeypatch.setattr(routes.time, "time", lambda: committed_at + 2)
+    resp = client.get("/groups/g-lm/balances")
+    assert resp.last_modified.timestamp() == int(committed_at) + 1
+    ims = resp.headers["Last-Modified"]
+    assert client.get("/groups/g-lm/balances", headers={"If-Modified-Since": ims}).status_code == 304
+    assert client.get("/groups/g-lm/balances", headers={"If-None-Match": '"other"',
+                                                        "If-Modified-Since": ims}).status_code == 200
+
+
+@pytest.mark.parametrize("body", [
+    [{"title": "x", "amount": "10", "paid_by": "A", "checked_names": ["A", "B"]}],
+    [{"title": "x", "amount": 10, "paid_by": "Z", "checked_names": ["A", "B"]}],
+    [1],
+    "text",
+])
+def test_group_transactions_reject_malformed_rows(client, body):
+    client.post("/groups/g-bad", json={"names": ["A", "B"]})
+    assert client.post("/groups/g-bad/transactions", json=body).status_code == 400
+
+
+def test_form_with_bad_amount_is_400(client):
+    resp = client.post("/matrix", data={"size": "1", "row_count": "1", "colname_1": "A", "amount_1": "x"})
+    assert resp.status_code == 400
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from settlement_cache import SettlementCache, cache_path
+
+
+def test_round_trip_and_shared_file(tmp_path):
+    base = str(tmp_path / "cache.bin")
+    a = SettlementCache(base, slots=4, slot_size=4096)
+    a.put("k", {"m": np.eye(3)})
+    b = SettlementCache(base, slots=4, slot_size=4096)   # another worker on the same file
+    assert (b.get("k")["m"] == np.eye(3)).all()
+    assert a.path == b.path == cache_path(base, 4, 4096)
+
+
+def test_other_geometry_never_touches_a_live_file(tmp_path):
+    base = str(tmp_path / "cache.bin")
+    live = SettlementCache(base, slots=4, slot_size=4096)
+    live.put("k", {"m": np.ones(2)})
+    size = os.path.getsize(live.path)
+
+    other = SettlementCache(base, slots=8, slot_size=4096)
+    assert other.path != live.path
+    assert os.path.getsize(live.path) == size
+    assert (live.get("k")["m"] == 1).all()
+
+
+def test_foreign_file_is_refused_not_truncated(tmp_path):
+    base = str(tmp_path / "cache.bin")
+    path = cache_path(base, 4, 4096)
+    with open(path, "wb") as f:
+        f.write(b"not a cache")
+    with pytest.raises(ValueError):
+        SettlementCache(base, slots=4, slot_size=4096)
+    with open(path, "rb") as f:
+        assert f.read() == b"not a cache"
+
+
+def test_settlements_are_cached_per_algorithm_version(settlement_cache_file, monkeypatch):
+    from collections import OrderedDict
+
+    import matrix_store
+
+    monkeypatch.setattr(matrix_store, "_store", OrderedDict())   # not settled by an earlier test
+    key = matrix_store.put_matrix(["A", "B"], [[0, 10], [0, 0]])
+    matrix_store.get_settlement(key)
+    assert settlement_cache_file.get(f"settled:v{matrix_store.SETTLEMENT_VERSION}:{key}") is not None
+
+    # A newer build ignores what the old one cached, even for the same matrix
+    monkeypatch.setattr(matrix_store, "SETTLEMENT_VERSION", matrix_store.SETTLEMENT_VERSION + 1)
+    monkeypatch.setattr(matrix_store, "_store", OrderedDict())
+    settlement_cache_file.put(f"settled:v{matrix_store.SETTLEMENT_VERSION - 1}:{key}", {"settled": np.eye(2)})
+    assert matrix_store.get_settlement(key) == [{"from": "A", "to": "B", "amount": 10.0}]
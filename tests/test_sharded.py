@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from Dataclass.splitDataclass import parse_initial_input, new_compute_allocations, print_settlement_matrix
+from logic.split_constrained import net_in_cents
+from logic.split_sharded import map_shard, sharded_net_balances
+
+ALL8 = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "json", "all8.json")
+
+
+@pytest.fixture
+def split():
+    with open(ALL8) as f:
+        return json.load(f)
+
+
+def single_pass(split):
+    ms = new_compute_allocations(parse_initial_input(split))
+    matrix, _ = print_settlement_matrix(ms)
+    return np.array([ms.names_map[name].net_balance for name in ms.names]), np.array(matrix)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded_output_equals_a_single_pass(split, workers):
+    txs = split["transactions"]
+    shards = [txs[k::3] for k in range(3)] + [[]]
+    net, matrix = sharded_net_balances(shards, split["names"], workers=workers)
+    expected_net, expected_matrix = single_pass(split)
+    assert net == pytest.approx(expected_net)
+    assert matrix == pytest.approx(expected_matrix)
+    assert (net_in_cents(matrix) == net_in_cents(expected_matrix)).all()
+
+
+def test_map_shard_returns_only_the_pairs_that_owe(split):
+    net, (rows, cols, amounts) = map_shard(split, split["names"])
+    _, expected = single_pass(split)
+    assert rows.size == np.count_nonzero(expected)
+    assert (amounts > 0).all()
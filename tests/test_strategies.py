@@ -0,0 +1,195 @@
+import numpy as np
+import pytest
+
+from logic.split_bucketed import settle_bucketed, settle_bucketed_matrix
+from logic.split_capped import settle_capped
+from logic.split_constrained import net_in_cents, settle_constrained
+from logic.split_hierarchical import settle_hierarchical
+from logic.split_logics import reduce_bidirectional, remove_self_loops, settle_greedy
+from logic.split_quality import DEFAULT_STRATEGIES, scoreboard
+
+LABELS = ["A", "B", "C", "D"]
+
+
+def owe_matrix(net):
+    """An owe matrix with the given net balances (everyone settles through person 0)."""
+    n = len(net)
+    M = np.zeros((n, n))
+    for i in range(1, n):
+        if net[i] < 0:
+            M[i, 0] = -net[i]
+        else:
+            M[0, i] = net[i]
+    return M
+
+
+def assert_settles(settled, matrix):
+    assert (net_in_cents(settled) == net_in_cents(matrix)).all()
+
+
+@pytest.mark.parametrize("net", [[-5, 5], [0, 0], [], [-5, 5, -3, 3], [0.0, 0.0, 0.0]])
+def test_bucketed_edge_cases(net):
+    payer, payee, amount, stats = settle_bucketed(np.array(net, dtype=float))
+    assert payer.size == payee.size == amount.size == stats["transfers"]
+    assert stats["extra"] <= 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bucketed_settles_every_balance(seed):
+    rng = np.random.default_rng(seed)
+    M = np.round(rng.uniform(0, 50, (4, 4)), 2)
+    np.fill_diagonal(M, 0)
+    settled = settle_bucketed_matrix(M, LABELS)
+    assert_settles(settled, M)
+    assert np.count_nonzero(settled) <= 3
+
+
+def test_bucketed_fully_paired():
+    M = owe_matrix([0, -5, 5])   # B owes 5, C is owed 5, both through A
+    settled = settle_bucketed_matrix(M, LABELS[:3])
+    assert_settles(settled, M)
+    assert np.count_nonzero(settled) == 1
+
+
+def test_scoreboard_scores_every_strategy():
+    M = np.array([[0, 10], [0, 0]], dtype=float)
+    board = scoreboard(M, ["A", "B"])
+    assert board["bounds"]["lower_bound"] == 1
+    for row in board["strategies"].values():
+        assert row["settles"] and row["transfers"] == 1
+
+
+def test_scoreboard_reports_a_crashing_strategy():
+    def broken(matrix, labels):
+        return matrix[len(labels)]
+
+    board = scoreboard(np.array([[0, 10], [0, 0]], dtype=float), ["A", "B"],
+                       {"broken": broken, "greedy": settle_greedy})
+    assert board["strategies"]["broken"]["error"].startswith("IndexError")
+    assert board["strategies"]["greedy"]["settles"]
+
+
+
+@pytest.mark.parametrize("net, max_out, max_in", [
+    ([4, -3, -1, 3, -2, -1], 1, 2),
+    ([9, -7, -2, 8, -4, -4], 2, 2),
+])
+def test_capped_finds_plans_the_greedy_pass_misses(net, max_out, max_in):
+    M = owe_matrix(net)
+    settled = settle_capped(M, [f"P{i}" for i in range(len(net))], max_out, max_in)
+    assert_settles(settled, M)
+    assert ((settled > 0).sum(axis=1) <= max_out).all()
+    assert ((settled > 0).sum(axis=0) <= max_in).all()
+
+
+def test_capped_raises_when_no_plan_exists():
+    # Two debtors of 1 into one creditor of 2 needs two incoming slots
+    with pytest.raises(ValueError):
+        settle_capped(owe_matrix([2, -1, -1]), ["A", "B", "C"], max_in=1)
+    # Passes the quick checks, but no two of 4, 4, 1, 1 add up to 7
+    with pytest.raises(ValueError, match="No settlement meets"):
+        settle_capped(owe_matrix([7, 3, -4, -4, -1, -1]), list("ABCDEF"), max_out=1, max_in=2)
+
+
+@pytest.mark.parametrize("net", [[], [0, 0], [-5, 5], [0, -5, 5]])
+def test_capped_edge_cases(net):
+    M = owe_matrix(net)
+    settled = settle_capped(M, [f"P{i}" for i in range(len(net))], 1, 1)
+    assert_settles(settled, M)
+
+
+def test_constrained_uses_only_allowed_edges():
+    M = owe_matrix([10, -4, -6, 0])
+    settled = settle_constrained(M, LABELS, allowed=[("B", "D"), ("C", "D"), ("D", "A")])
+    assert_settles(settled, M)
+    assert set(zip(*np.nonzero(settled))) <= {(1, 3), (2, 3), (3, 0)}
+    with pytest.raises(ValueError):
+        settle_constrained(M, LABELS, allowed=[("B", "A")])
+
+
+@pytest.mark.parametrize("net", [[], [0, 0], [-5, 5]])
+def test_constrained_edge_cases(net):
+    M = owe_matrix(net)
+    assert_settles(settle_constrained(M, [f"P{i}" for i in range(len(net))]), M)
+
+
+def test_constrained_stops_once_the_plan_stops_improving(monkeypatch):
+    import logic.split_constrained as split_constrained
+
+    calls = []
+    solve = split_constrained._solve
+    monkeypatch.setattr(split_constrained, "_solve", lambda G: calls.append(1) or solve(G))
+    rng = np.random.default_rng(0)
+    M = np.round(rng.uniform(0, 50, (30, 30)), 2)
+    np.fill_diagonal(M, 0)
+    assert_settles(settle_constrained(M, [str(i) for i in range(30)], iterations=8), M)
+    assert len(calls) < 8
+
+
+def random_owe_matrix(n, seed):
+    rng = np.random.default_rng(seed)
+    M = np.round(rng.uniform(0, 80, (n, n)) * (rng.random((n, n)) < 0.5), 2)
+    np.fill_diagonal(M, 0)
+    return M
+
+
+CASES = {
+    "empty": np.zeros((3, 3)),
+    "fully_paired": owe_matrix([0, -5, 5, -7, 7]),
+    "one_debt": np.array([[0, 10.0], [0, 0]]),
+    "random_6": random_owe_matrix(6, 1),
+    "random_12": random_owe_matrix(12, 2),
+}
+
+
+@pytest.mark.parametrize("strategy", sorted(DEFAULT_STRATEGIES))
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_every_strategy_settles_every_balance(strategy, case):
+    M = CASES[case]
+    labels = [f"P{i}" for i in range(len(M))]
+    reduced = reduce_bidirectional(remove_self_loops(M), labels)
+    settled = DEFAULT_STRATEGIES[strategy](reduced, labels)
+    assert_settles(settled, M)
+    assert (np.asarray(settled) >= 0).all()
+    if case == "empty":
+        assert not np.asarray(settled).any()
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_scoreboard_has_no_errors_and_respects_the_bound(case):
+    M = CASES[case]
+    board = scoreboard(M, [f"P{i}" for i in range(len(M))])
+    for row in board["strategies"].values():
+        assert "error" not in row and row["settles"]
+        assert row["transfers"] >= board["bounds"]["lower_bound"]
+
+
+def households(labels, size=2):
+    """Cluster id per label: consecutive labels share a household."""
+    return {label: f"h{i // size}" for i, label in enumerate(labels)}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_hierarchical_settles_every_balance(case, workers):
+    M = CASES[case]
+    labels = [f"P{i}" for i in range(len(M))]
+    clusters = households(labels, 3)
+    settled, transfers = settle_hierarchical(M, labels, clusters, workers=workers)
+    assert_settles(settled, M)
+    assert (settled >= 0).all()
+    # Between households only representatives pay each other
+    reps = {t[k] for t in transfers if t["level"] != "cluster" for k in ("from", "to")}
+    assert len({clusters[label] for label in reps}) == len(reps)
+    for t in transfers:
+        if t["level"] == "cluster":
+            assert clusters[t["from"]] == clusters[t["to"]]
+
+
+def test_hierarchical_uses_the_given_representative():
+    M = owe_matrix([10, -4, -6, 0])
+    settled, transfers = settle_hierarchical(M, LABELS, {"B": "x", "C": "x"}, {"x": "C"})
+    assert_settles(settled, M)
+    assert {(t["from"], t["to"]) for t in transfers} == {("B", "C"), ("C", "A")}
+    with pytest.raises(ValueError):
+        settle_hierarchical(M, LABELS, {"B": "x", "C": "x"}, {"x": "A"})
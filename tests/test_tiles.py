@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import matrix_store
+from routes import MAX_SPARSE_PAGE, MAX_TILE_SIZE
+
+N = 6
+
+
+@pytest.fixture
+def key(monkeypatch):
+    # A fresh local store, so the matrix also lands in this test's shared cache file
+    monkeypatch.setattr(matrix_store, "_store", OrderedDict())
+    M = np.arange(N * N, dtype=float).reshape(N, N)
+    np.fill_diagonal(M, 0)
+    return matrix_store.put_matrix([f"P{i}" for i in range(N)], M)
+
+
+@pytest.mark.parametrize("query, corner, shape", [
+    ("row=2&col=3&rows=2&cols=2", (2, 3), (2, 2)),
+    ("row=4&col=4&rows=50&cols=50", (4, 4), (2, 2)),     # cut at the matrix edge
+    ("row=-3&col=-1&rows=2&cols=2", (0, 0), (2, 2)),     # negative corner clamps to 0
+    ("row=99&col=0&rows=2&cols=2", (N, 0), (0, 2)),      # past the end: empty window
+    ("rows=-5&cols=3", (0, 0), (0, 3)),
+])
+def test_tile_bounds(client, key, query, corner, shape):
+    tile = client.get(f"/matrix/{key}/tile?{query}").get_json()
+    assert (tile["row"], tile["col"]) == corner
+    assert (len(tile["row_names"]), len(tile["col_names"])) == shape
+    assert len(tile["cells"]) == shape[0]
+    assert all(len(row) == shape[1] for row in tile["cells"])
+
+
+def test_tile_size_is_capped(client):
+    n = MAX_TILE_SIZE + 10
+    key = matrix_store.put_matrix([str(i) for i in range(n)], np.ones((n, n)))
+    tile = client.get(f"/matrix/{key}/tile?rows={n}&cols={n}").get_json()
+    assert len(tile["cells"]) == len(tile["cells"][0]) == MAX_TILE_SIZE
+
+
+@pytest.mark.parametrize("query, offset, count", [
+    ("offset=0&limit=4", 0, 4),
+    ("offset=-7&limit=4", 0, 4),
+    ("offset=28&limit=100", 28, 2),
+    ("offset=99", 99, 0),
+    ("offset=0&limit=-1", 0, 0),
+    (f"limit={MAX_SPARSE_PAGE + 1}", 0, N * N - N),
+])
+def test_sparse_bounds(client, key, query, offset, count):
+    page = client.get(f"/matrix/{key}/sparse?{query}").get_json()
+    assert page["total"] == N * N - N
+    assert page["offset"] == offset
+    assert len(page["cells"]) == count
+
+
+def test_evicted_matrix_is_served_from_the_shared_cache(client, key, monkeypatch):
+    monkeypatch.setattr(matrix_store, "MAX_ENTRIES", 1)
+    matrix_store.put_matrix(["X"], [[0.0]])
+    assert key not in matrix_store._store
+    assert client.get(f"/matrix/{key}/tile?rows=1&cols=2").get_json()["cells"] == [[0.0, 1.0]]
+    assert client.get(f"/matrix/{key}/sparse?limit=1").get_json()["cells"] == [[0, 1, 1.0]]
+
+
+def test_evicted_matrix_without_the_shared_cache_is_404(client, key, monkeypatch):
+    monkeypatch.setattr(matrix_store, "MAX_ENTRIES", 1)
+    monkeypatch.setattr(matrix_store, "SHARED_CACHE", False)
+    matrix_store.put_matrix(["Y"], [[0.0]])
+    assert client.get(f"/matrix/{key}/tile").status_code == 404
+    assert client.get(f"/matrix/{key}/sparse").status_code == 404
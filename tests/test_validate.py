@@ -0,0 +1,60 @@
+from Dataclass.splitDataclass import parse_initial_input, new_compute_allocations
+from Dataclass.splitValidate import validate_ledger
+
+NAMES = ["A", "B", "C"]
+
+
+def tx(**kw):
+    base = {"title": "t", "amount": 30.0, "paid_by": "A", "even_split": True, "checked_names": ["A", "B", "C"]}
+    base.update(kw)
+    return base
+
+
+def codes(report):
+    return {(e["row"], e["code"], e["field"]) for e in report.errors}
+
+
+def test_valid_ledger_is_ok():
+    report = validate_ledger([tx(), tx(paid_by="B")], NAMES)
+    assert report.ok and report.row_count == 2 and report.errors == []
+
+
+def test_reports_every_error_with_its_row():
+    report = validate_ledger([
+        tx(amount=None),
+        tx(paid_by="Z"),
+        tx(checked_names=[]),
+        tx(amount=-1),
+        tx(even_split=False, uneven_split_map={"A": 40}),
+    ], NAMES)
+    assert not report.ok
+    assert codes(report) == {
+        (0, "missing", "amount"),
+        (1, "unknown_payer", "paid_by"),
+        (2, "missing", "checked_names"),
+        (3, "negative", "amount"),
+        (4, "shares_exceed_amount", "uneven_split_map"),
+    }
+
+
+def test_numeric_strings_are_rejected():
+    report = validate_ledger([tx(amount="12"), tx(even_split=False, uneven_split_map={"B": "5"})], NAMES)
+    assert codes(report) == {(0, "invalid", "amount"), (1, "invalid", "uneven_split_map")}
+
+
+def test_missing_even_split_uses_the_allocator_default():
+    # No even_split and explicit shares: uneven for both the validator and the allocator
+    row = tx(uneven_split_map={"B": 25})
+    del row["even_split"]
+    assert validate_ledger([row], NAMES).ok
+    over = dict(row, uneven_split_map={"B": 40})
+    assert codes(validate_ledger([over], NAMES)) == {(0, "shares_exceed_amount", "uneven_split_map")}
+
+    ms = new_compute_allocations(parse_initial_input({"names": NAMES, "transactions": [row]}))
+    assert ms.names_map["B"].total_owed == 25
+
+
+def test_matrix_route_rejects_invalid_rows(client):
+    resp = client.post("/matrix", json={"names": ["A", "B"], "rows": [{"title": "x", "amount": 10, "checked": [0, 1]}]})
+    assert resp.status_code == 400
+    assert resp.get_json()["errors"][0]["field"] == "paid_by"